@@ -0,0 +1,164 @@
+"""Бенчмарк запросов истории и лидерборда на большой синтетической базе.
+
+Запуск:  python bench_db.py --users 10000 --sessions 1000000
+Создаёт отдельный файл базы (по умолчанию bench_trainer.db), заполняет его
+схемой версии 1 (без индексов), замеряет запросы, затем применяет остальные
+миграции и замеряет ещё раз. Печатает планы запросов (EXPLAIN QUERY PLAN)
+и задержки до/после.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import db
+from migrations import migrate, get_schema_version
+from leaderboard import SORT_KEYS, get_leaderboard_page, get_user_rank
+from streaks import recompute_streaks
+
+HISTORY_SQL = '''SELECT date, avg_rt, misses, false_alarms, variability, accuracy
+                 FROM sessions WHERE user_id = ? ORDER BY date DESC'''
+
+# Агрегат по всем сессиям (лидерборд до появления user_stats)
+LEADERBOARD_SQL = '''
+    SELECT
+        u.username,
+        agg.avg_rt,
+        agg.avg_errors,
+        agg.avg_accuracy
+    FROM (
+        -- группировка по user_id идёт в порядке индекса idx_sessions_user_date
+        SELECT
+            user_id,
+            AVG(avg_rt) as avg_rt,
+            AVG(misses + false_alarms) as avg_errors,
+            AVG(accuracy) as avg_accuracy
+        FROM sessions
+        GROUP BY user_id
+    ) agg
+    JOIN users u ON u.id = agg.user_id
+    ORDER BY agg.avg_rt ASC
+    LIMIT 5
+'''
+
+def populate(conn, n_users, n_sessions, seed=42):
+    rnd = random.Random(seed)
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    cur.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                    ((f"user{i}", "pass") for i in range(n_users)))
+
+    start = datetime(2024, 1, 1)
+
+    def rows():
+        for _ in range(n_sessions):
+            rt = rnd.gauss(330, 50)
+            yield (rnd.randint(1, n_users),
+                   (start + timedelta(seconds=rnd.randint(0, 2 * 365 * 86400))).strftime('%Y-%m-%d %H:%M:%S'),
+                   round(rt, 1), rnd.randint(0, 6), rnd.randint(0, 4),
+                   round(abs(rnd.gauss(45, 10)), 1), round(rnd.uniform(70, 100), 1), "[]")
+
+    cur.executemany('''INSERT INTO sessions
+        (user_id, date, avg_rt, misses, false_alarms, variability, accuracy, correct_rts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows())
+    conn.commit()
+
+
+def show_plan(conn, title, sql, params=()):
+    print(f"  План: {title}")
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+        print(f"    {row[-1]}")
+
+
+def summarize(samples):
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95
+
+
+def timed(conn, sql, params_iter, repeat):
+    samples = []
+    for params in params_iter(repeat):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+
+def timed_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+
+def run_queries(conn, n_users, repeat):
+    rnd = random.Random(7)
+    show_plan(conn, "история пользователя", HISTORY_SQL, (1,))
+    show_plan(conn, "лидерборд (агрегат по sessions)", LEADERBOARD_SQL)
+
+    history = timed(conn, HISTORY_SQL,
+                    lambda n: [(rnd.randint(1, n_users),) for _ in range(n)], repeat)
+    leaderboard = timed(conn, LEADERBOARD_SQL, lambda n: [()] * n, max(1, repeat // 20))
+    print(f"  история:   медиана {history[0]:8.2f} мс, p95 {history[1]:8.2f} мс")
+    print(f"  лидерборд: медиана {leaderboard[0]:8.2f} мс, p95 {leaderboard[1]:8.2f} мс")
+
+    if get_schema_version(conn) >= 4:
+        for sort in SORT_KEYS:
+            page = timed_call(lambda: get_leaderboard_page(sort, conn=conn), repeat)
+            deep = timed_call(lambda: get_leaderboard_page(sort, offset=n_users // 2, conn=conn), repeat)
+            rank = timed_call(lambda: get_user_rank(rnd.randint(1, n_users), sort, conn=conn), repeat)
+            print(f"  лидерборд user_stats ({sort}): топ {page[0]:.2f} мс, "
+                  f"середина {deep[0]:.2f} мс, моё место {rank[0]:.2f} мс (медианы)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--sessions', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--db', default='bench_trainer.db')
+    parser.add_argument('--keep', action='store_true', help="не удалять файл базы после прогона")
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    conn = db.get_connection(args.db)
+    migrate(conn, target=1)
+
+    t0 = time.perf_counter()
+    populate(conn, args.users, args.sessions)
+    print(f"Заполнено {args.users} пользователей / {args.sessions} сессий "
+          f"за {time.perf_counter() - t0:.1f} с")
+
+    print(f"\n=== Схема v{get_schema_version(conn)} (без индексов) ===")
+    run_queries(conn, args.users, args.repeat)
+
+    t0 = time.perf_counter()
+    migrate(conn)
+    print(f"\n=== Схема v{get_schema_version(conn)} "
+          f"(миграции за {time.perf_counter() - t0:.1f} с) ===")
+    run_queries(conn, args.users, args.repeat)
+
+    t0 = time.perf_counter()
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    count = recompute_streaks(cur)
+    conn.commit()
+    print(f"\nПересчёт стриков по истории ({count} пользователей): {time.perf_counter() - t0:.2f} с")
+
+    db.close_all()
+    if not args.keep:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import pygame
+
+# ====================== КЭШ ГРАФИКОВ ======================
+# Готовые поверхности графиков по ключу
+#   (вид графика, id пользователей, размер, водяной знак)
+# Водяной знак — (id последней сессии, число сессий) каждого пользователя
+# из user_stats: пока новых сессий нет, график берётся из кэша, а после
+# новой тренировки ключ меняется сам. save_session_async дополнительно сбрасывает
+# записи пользователя (invalidate), чтобы не держать устаревшие.
+#
+# Два уровня: память (LRU, ограничение по байтам) и необязательный диск
+# (сырые RGBA-пиксели, ограничение по байтам, вытесняются самые старые
+# по mtime). Диск переживает перезапуск и общий для станций с одной базой.
+# Возвращаемые поверхности общие — рисовать на них нельзя.
+# invalidate вызывается и из потока записи сессий (save_session_async),
+# поэтому состояние кэша защищено блокировкой; build() выполняется без неё.
+
+MEMORY_MAX_BYTES = 64 * 1024 * 1024
+DISK_MAX_BYTES = 256 * 1024 * 1024
+DISK_SUFFIX = '.rgba'
+
+_HEADER = struct.Struct('<I')       # число поверхностей
+_SURFACE = struct.Struct('<II')     # ширина, высота каждой
+
+
+def _nbytes(surfaces):
+    return sum(s.get_width() * s.get_height() * 4 for s in surfaces)
+
+
+def _file_name(kind, user_ids, size, watermark):
+    # всё, что нужно для invalidate, видно прямо в имени файла
+    users = '-'.join(str(u) for u in user_ids)
+    mark = '-'.join(f"{last}.{count}" for last, count in watermark)
+    return f"{kind}__{users}__{size[0]}x{size[1]}__{mark}{DISK_SUFFIX}"
+
+
+class ChartCache:
+    def __init__(self, max_bytes=MEMORY_MAX_BYTES, disk_dir=None, disk_max_bytes=DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()   # ключ → (поверхности, байт)
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def set_disk_dir(self, path, max_bytes=DISK_MAX_BYTES):
+        """Включает дисковый уровень (None — выключает)"""
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self.disk_dir = path
+            self.disk_max_bytes = max_bytes
+
+    def get(self, kind, user_ids, size, watermark, build):
+        """Кортеж поверхностей графика; при промахе строится вызовом build()"""
+        surfaces = self.lookup(kind, user_ids, size, watermark)
+        if surfaces is None:
+            surfaces = self.put(kind, user_ids, size, watermark, build())
+        return surfaces
+
+    def lookup(self, kind, user_ids, size, watermark):
+        """Поверхности из памяти или с диска; None — промах (график строят отдельно и отдают в put)"""
+        key = (kind, tuple(user_ids), tuple(size), tuple(watermark))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            surfaces = self._load(key)
+            if surfaces is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, surfaces)
+            return surfaces
+
+    def put(self, kind, user_ids, size, watermark, surfaces):
+        key = (kind, tuple(user_ids), tuple(size), tuple(watermark))
+        surfaces = tuple(surfaces)
+        with self._lock:
+            self._store(key, surfaces)
+            self._remember(key, surfaces)
+        return surfaces
+
+    def invalidate(self, user_id=None):
+        """Сбрасывает графики, в которых участвует пользователь (None — все)"""
+        with self._lock:
+            for key in [k for k in self._entries if user_id is None or user_id in k[1]]:
+                self._bytes -= self._entries.pop(key)[1]
+            if self.disk_dir is None:
+                return
+            for name in self._disk_files():
+                users = name.split('__')[1].split('-')
+                if user_id is None or str(user_id) in users:
+                    self._remove(name)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.disk_hits) / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ---------- память (вызывается под self._lock) ----------
+
+    def _remember(self, key, surfaces):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        nbytes = _nbytes(surfaces)
+        self._entries[key] = (surfaces, nbytes)
+        self._bytes += nbytes
+        # последний добавленный не вытесняем, даже если он один больше лимита
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, freed) = self._entries.popitem(last=False)
+            self._bytes -= freed
+            self.evictions += 1
+
+    # ---------- диск (вызывается под self._lock) ----------
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, _file_name(*key))
+
+    def _disk_files(self):
+        try:
+            return [n for n in os.listdir(self.disk_dir) if n.endswith(DISK_SUFFIX)]
+        except OSError:
+            return []
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.disk_dir, name))
+        except OSError:
+            pass
+
+    def _load(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = memoryview(f.read())
+            os.utime(path)  # отметка использования для вытеснения
+            (count,) = _HEADER.unpack_from(data)
+            offset = _HEADER.size
+            surfaces = []
+            for _ in range(count):
+                width, height = _SURFACE.unpack_from(data, offset)
+                offset += _SURFACE.size
+                end = offset + width * height * 4
+                surfaces.append(pygame.image.frombuffer(data[offset:end], (width, height), 'RGBA'))
+                offset = end
+            return tuple(surfaces)
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def _store(self, key, surfaces):
+        if self.disk_dir is None:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(len(surfaces)))
+                for surf in surfaces:
+                    f.write(_SURFACE.pack(*surf.get_size()))
+                    f.write(pygame.image.tobytes(surf, 'RGBA'))
+            os.replace(tmp, path)  # другая станция не увидит недописанный файл
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        for name in self._disk_files():
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(name)
+            total -= size
+            self.evictions += 1
+
+
+chart_cache = ChartCache()
@@ -0,0 +1,115 @@
+import io
+import os
+import tempfile
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import AutoLocator, ScalarFormatter
+
+# ====================== ГРАФИКИ ДЛЯ PDF ======================
+# matplotlib нужен только отчётам: экраны рисуют графики сами (plot.py).
+# Каждый вид графика — LineChart: фигура, оси, подписи, стиль линии
+# создаются один раз на процесс (get_chart), а при следующем отчёте
+# меняются только данные линии (set_data), пределы осей (relim) и подписи
+# значений — без pyplot и без повторной раскладки фигуры.
+
+BACKGROUND = '#141428'
+MY_COLOR = '#00FF9F'
+ACC_COLOR = '#4DA6FF'
+
+_charts = {}
+
+
+class LineChart:
+    """Фигура с одной линией; setup(figure, axes) оформляет оси и возвращает Line2D"""
+
+    def __init__(self, setup, figsize, dpi, facecolor='white', value_labels=None, xticks_from_data=False):
+        """value_labels — {'fmt': '{}', ...kwargs annotate} для подписей значений над точками"""
+        self.figure = Figure(figsize=figsize, dpi=dpi, facecolor=facecolor)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.line = setup(self.figure, self.axes)
+        self.value_labels = dict(value_labels) if value_labels else None
+        self.xticks_from_data = xticks_from_data
+        self._fixed_xticks = False
+        self._labels = []   # подписи значений; лишние скрываются, а не удаляются
+
+    def update(self, x, y):
+        x, y = list(x), list(y)
+        labels = None
+        if any(isinstance(v, str) for v in x):
+            # подписи-строки: точки по порядку, сами строки — на метках оси
+            # (категориальные единицы копили бы значения всех прошлых отчётов)
+            x, labels = list(range(len(x))), [str(v) for v in x]
+        self.line.set_data(x, y)
+        if self.xticks_from_data or labels is not None:
+            self.axes.set_xticks(x, labels=labels)
+        elif self._fixed_xticks:
+            self.axes.xaxis.set_major_locator(AutoLocator())
+            self.axes.xaxis.set_major_formatter(ScalarFormatter())
+        self._fixed_xticks = self.xticks_from_data or labels is not None
+        self.axes.relim()
+        self.axes.autoscale_view()
+        if self.value_labels is not None:
+            self._update_labels(x, y)
+        return self
+
+    def _update_labels(self, x, y):
+        options = dict(self.value_labels)
+        fmt = options.pop('fmt', '{}')
+        for i, point in enumerate(zip(x, y)):
+            if i == len(self._labels):
+                self._labels.append(self.axes.annotate('', point, **options))
+            label = self._labels[i]
+            label.xy = point
+            label.set_text(fmt.format(point[1]))
+            label.set_visible(True)
+        for label in self._labels[len(x):]:
+            label.set_visible(False)
+
+    def png(self, **savefig_kwargs):
+        """PNG в BytesIO (для reportlab)"""
+        data = io.BytesIO()
+        self.figure.savefig(data, format='png', **savefig_kwargs)
+        data.seek(0)
+        return data
+
+    def png_file(self, **savefig_kwargs):
+        """Для FPDF (ему нужен путь к файлу): уникальный временный PNG, удаляет вызывающий"""
+        fd, path = tempfile.mkstemp(prefix='neurosprint_', suffix='.png')
+        with os.fdopen(fd, 'wb') as f:
+            self.figure.savefig(f, format='png', **savefig_kwargs)
+        return path
+
+
+def get_chart(name, build):
+    """LineChart по имени; build() вызывается один раз на процесс"""
+    chart = _charts.get(name)
+    if chart is None:
+        chart = _charts[name] = build()
+    return chart
+
+
+# ---------- FPDF-отчёт (ReactionTrainer.generate_pdf_report) ----------
+
+def _dark_chart(title, ylabel, marker, color):
+    def setup(figure, axes):
+        (line,) = axes.plot([], [], marker=marker, linewidth=3, color=color)
+        axes.set_title(title, color='white')
+        axes.set_xlabel('Номер тренировки', color='white')
+        axes.set_ylabel(ylabel, color='white')
+        axes.tick_params(colors='white')
+        axes.grid(True, alpha=0.3)
+        # поля фиксированы: раскладка не пересчитывается от отчёта к отчёту
+        figure.subplots_adjust(left=0.11, right=0.97, bottom=0.15, top=0.9)
+        return line
+    return lambda: LineChart(setup, figsize=(7.5, 3.6), dpi=200, facecolor=BACKGROUND, xticks_from_data=True)
+
+
+def report_charts(sessions):
+    """Пути к временным PNG (RT, точность) для generate_pdf_report"""
+    numbers = list(range(1, len(sessions) + 1))
+    rt = get_chart('fpdf_rt', _dark_chart('Прогресс среднего времени реакции', 'RT (мс)', 'o', MY_COLOR))
+    acc = get_chart('fpdf_accuracy', _dark_chart('Прогресс точности', 'Точность (%)', 's', ACC_COLOR))
+    return [rt.update(numbers, [s['avg_rt'] for s in sessions]).png_file(facecolor=BACKGROUND),
+            acc.update(numbers, [s['accuracy'] for s in sessions]).png_file(facecolor=BACKGROUND)]
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import atexit
+from contextlib import contextmanager
+
+# ====================== ПОДКЛЮЧЕНИЕ К БАЗЕ ======================
+# Общий слой подключений для game.py и editor.py.
+# Каждый поток держит одно долгоживущее соединение (WAL + настроенные PRAGMA),
+# а sqlite3 кэширует подготовленные выражения внутри соединения —
+# т.е. кэш prepared statements получается отдельным для каждого потока.
+
+DB_NAME = 'reaction_trainer.db'
+
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",        # читатели не блокируют писателя
+    "PRAGMA synchronous = NORMAL",      # в WAL безопасно, fsync только на checkpoint
+    "PRAGMA cache_size = -16000",       # ~16 МБ страничного кэша
+    "PRAGMA mmap_size = 134217728",     # 128 МБ memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+)
+
+_local = threading.local()
+_all_connections = []
+_lock = threading.Lock()
+
+
+def _open_connection(db_name):
+    conn = sqlite3.connect(db_name,
+                           timeout=BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
+    cur = conn.cursor()
+    for pragma in PRAGMAS:
+        cur.execute(pragma)
+    cur.close()
+    return conn
+
+
+def get_connection(db_name=DB_NAME):
+    """Долгоживущее соединение текущего потока (создаётся при первом обращении)"""
+    conns = getattr(_local, 'connections', None)
+    if conns is None:
+        conns = _local.connections = {}
+    conn = conns.get(db_name)
+    if conn is None:
+        conn = _open_connection(db_name)
+        conns[db_name] = conn
+        with _lock:
+            _all_connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction(db_name=DB_NAME):
+    """Одна транзакция: commit при успехе, rollback при исключении"""
+    conn = get_connection(db_name)
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def execute(sql, params=(), db_name=DB_NAME):
+    """Выполняет запрос с записью и сразу фиксирует его"""
+    with transaction(db_name) as cur:
+        cur.execute(sql, params)
+        return cur
+
+
+def fetch_one(sql, params=(), db_name=DB_NAME):
+    return get_connection(db_name).execute(sql, params).fetchone()
+
+
+def fetch_all(sql, params=(), db_name=DB_NAME):
+    return get_connection(db_name).execute(sql, params).fetchall()
+
+
+def close_all():
+    """Закрывает все соединения (вызывается автоматически при выходе)"""
+    with _lock:
+        while _all_connections:
+            conn = _all_connections.pop()
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    _local.__dict__.pop('connections', None)
+
+
+atexit.register(close_all)
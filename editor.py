@@ -1,39 +1,51 @@
 import sqlite3
 from datetime import datetime
+from db import DB_NAME, get_connection, transaction, close_all
+from migrations import migrate
+from user_stats import rebuild_user_stats
+from rt_codec import encode_rts, decode_rts
+from streaks import recompute_streaks
+
+def pack_correct_rts(batch_size=500):
+    """Переводит старые JSON-строки correct_rts в упакованный BLOB.
+
+    Идёт по id порциями, каждая порция — отдельная короткая транзакция,
+    так что тренажёр на других станциях не блокируется надолго.
+    """
+    conn = get_connection()
+    last_id = 0
+    converted = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, correct_rts FROM sessions
+            WHERE id > ? AND typeof(correct_rts) = 'text'
+            ORDER BY id LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            break
 
-DB_NAME = 'reaction_trainer.db'
-def migrate_database():
-    conn = sqlite3.connect('reaction_trainer.db')
-    cur = conn.cursor()
-    try:
-        # Проверяем столбцы в users
-        cur.execute("PRAGMA table_info(users)")
-        columns = [row[1] for row in cur.fetchall()]
-
-        # Добавляем last_training_date, если нет
-        if 'last_training_date' not in columns:
-            cur.execute("ALTER TABLE users ADD COLUMN last_training_date TEXT DEFAULT NULL")
-            conn.commit()
-            print("Добавлен столбец last_training_date")
+        updates = []
+        for session_id, value in rows:
+            try:
+                updates.append((encode_rts(decode_rts(value)), session_id))
+            except ValueError as e:
+                print(f"Сессия {session_id}: не удалось разобрать correct_rts ({e}), пропускаю")
 
-        # Добавляем streak, если нет
-        if 'streak' not in columns:
-            cur.execute("ALTER TABLE users ADD COLUMN streak INTEGER DEFAULT 0")
-            conn.commit()
-            print("Добавлен столбец streak")
+        with transaction() as cur:
+            cur.executemany("UPDATE sessions SET correct_rts = ? WHERE id = ?", updates)
+
+        converted += len(updates)
+        last_id = rows[-1][0]
+        print(f"  упаковано {converted} сессий...")
 
-        print("Миграция завершена")
-    except Exception as e:
-        print("Ошибка миграции:", e)
-    finally:
-        conn.close()
+    return converted
 
 def edit_user_data():
     """Консольный редактор данных пользователей"""
     print("=== Редактирование данных пользователей ===")
     print("Подключение к базе:", DB_NAME)
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cur = conn.cursor()
 
     while True:
@@ -42,9 +54,12 @@ def edit_user_data():
         print("2. Изменить данные конкретного пользователя")
         print("3. Добавить нового пользователя")
         print("4. Удалить пользователя")
+        print("5. Пересчитать статистику лидерборда (user_stats)")
+        print("6. Упаковать времена реакции (JSON -> BLOB)")
+        print("7. Пересчитать стрики всех пользователей по истории сессий")
         print("0. Выход")
 
-        choice = input("Выбери действие (0-4): ").strip()
+        choice = input("Выбери действие (0-7): ").strip()
 
         if choice == '0':
             break
@@ -176,14 +191,39 @@ def edit_user_data():
             confirm = input(f"Точно удалить пользователя с ID {user_id}? (да/нет): ").lower()
             if confirm == 'да':
                 cur.execute("DELETE FROM users WHERE id = ?", (int(user_id),))
+                cur.execute("DELETE FROM user_stats WHERE user_id = ?", (int(user_id),))
                 conn.commit()
                 print("Пользователь удалён.")
             else:
                 print("Отмена.")
 
-    conn.close()
+        elif choice == '5':
+            # Пересборка сводной таблицы по всем сессиям
+            try:
+                count = rebuild_user_stats()
+                print(f"Статистика пересчитана для {count} пользователей.")
+            except sqlite3.Error as e:
+                print("Ошибка пересчёта статистики:", e)
+
+        elif choice == '6':
+            # Потоковая конвертация старых строк
+            try:
+                count = pack_correct_rts()
+                print(f"Готово, упаковано сессий: {count}.")
+            except sqlite3.Error as e:
+                print("Ошибка упаковки:", e)
+
+        elif choice == '7':
+            # Стрики и даты последних тренировок — заново из sessions, одним проходом
+            try:
+                count = recompute_streaks()
+                print(f"Стрики пересчитаны, пользователей с тренировками: {count}.")
+            except sqlite3.Error as e:
+                print("Ошибка пересчёта стриков:", e)
+
+    close_all()
     print("\nРедактирование завершено. База закрыта.")
 
 if __name__ == "__main__":
-    migrate_database()
+    migrate()
     edit_user_data()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import pygame
+
+# ====================== РЕЕСТР ШРИФТОВ ======================
+# Каждый шрифт (гарнитура, размер) загружается один раз на процесс,
+# все кнопки и экраны получают общий объект. Общие объекты шрифтов ещё и
+# дают стабильные ключи для кэша текста (text_cache.py).
+
+_fonts = {}
+
+
+def get_font(size, path=None):
+    """pygame.font.Font(path, size); path=None — встроенный шрифт pygame"""
+    key = ('file', path, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[key] = pygame.font.Font(path, size)
+    return font
+
+
+def get_sysfont(name, size, bold=False, italic=False):
+    """pygame.font.SysFont(name, size) — поиск системного шрифта тоже только один раз"""
+    key = ('sys', name, size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold, italic)
+    return font
+
+
+def clear():
+    """Забывает загруженные шрифты (нужно после pygame.font.quit())"""
+    _fonts.clear()
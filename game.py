@@ -1,63 +1,56 @@
-from testpdf import ReactionReportGenerator
 import pygame
 import sys
-import random
+import multiprocessing
 import sqlite3
-import json
 from datetime import datetime
-import matplotlib.pyplot as plt
 from fpdf import FPDF
 import os
 import time
+from db import get_connection
+from user_state import user_states
+from migrations import migrate
+from rt_codec import decode_rts
+from session_store import write_session
+from writer import session_writer
+from streaks import update_streak
+from text_cache import render_text
+from fonts import get_font, get_sysfont
+from idle import IdleScreen, IDLE_TIMEOUT_MS
+from sprites import AnimatedSprite, pulse_frames, spinner_frames, sprite_cache
+from stimuli import StimulusAssets
+from schedule import build_schedule
+from training import TrainingSession, session_metrics, PHASES
+from instrumentation import frame_stats
+from plot import XView, Plot, Series, MY_COLOR, OTHER_COLOR, ACC_COLOR
+from chart_cache import chart_cache
+from render_service import render_service
+from leaderboard import SORT_KEYS, get_leaderboard_page, get_user_rank, count_ranked_users
 # ====================== НАСТРОЙКИ ======================
-DB_NAME = 'reaction_trainer.db'
+LEADERBOARD_PAGE_SIZE = 5  # строк на странице лидерборда
+HISTORY_PAGE_SIZE = 30  # сессий за один запрос истории
+CHART_CACHE_DIR = "chart_cache"  # дисковый кэш графиков (None — только память)
 
 def __init__(self):
     pygame.init()
     # Принудительное пересоздание таблиц (для отладки)
-    conn = sqlite3.connect('reaction_trainer.db')
+    conn = get_connection()
     cur = conn.cursor()
     cur.execute("DROP TABLE IF EXISTS sessions")
     cur.execute("DROP TABLE IF EXISTS users")
+    cur.execute("PRAGMA user_version = 0")
     conn.commit()
-    conn.close()
     init_db()  # теперь создаст чистые таблицы
     print("Таблицы пересозданы")
 # ====================== БАЗА ДАННЫХ ======================
 
 def init_db():
-    conn = sqlite3.connect('reaction_trainer.db')
-    cur = conn.cursor()
-    # Таблица пользователей
-    cur.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        last_training_date TEXT DEFAULT NULL,
-        streak INTEGER DEFAULT 0
-    )''')
-
-    # Таблица сессий — полный запрос
-    cur.execute('''CREATE TABLE IF NOT EXISTS sessions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        date TEXT NOT NULL,
-        avg_rt REAL,
-        misses INTEGER DEFAULT 0,
-        false_alarms INTEGER DEFAULT 0,
-        variability REAL,
-        accuracy REAL,
-        correct_rts TEXT,
-        FOREIGN KEY(user_id) REFERENCES users(id)
-    )''')
-
-    conn.commit()
-    conn.close()
+    # Схема создаётся и обновляется миграциями (см. migrations.py)
+    migrate()
 
     print("База данных инициализирована")
 
 def get_or_create_user(username):
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cur = conn.cursor()
     try:
         cur.execute("SELECT id FROM users WHERE username = ?", (username,))
@@ -69,39 +62,36 @@ def get_or_create_user(username):
         print(f"✅ Создан новый пользователь: {username}")
         return cur.lastrowid
     except Exception as e:
+        conn.rollback()
         print(f"❌ Ошибка создания пользователя: {e}")
         return None
     finally:
-        conn.close()
+        cur.close()
 
-def save_session(user_id, metrics):
-    if not user_id:
-        print("❌ save_session: user_id отсутствует")
-        return False
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    try:
-        date_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        correct_rts_str = json.dumps(metrics.get('correct_rts', []))
-
-        cur.execute('''INSERT INTO sessions 
-            (user_id, date, avg_rt, misses, false_alarms, variability, accuracy, correct_rts)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                    (user_id, date_str, metrics['avg_rt'], metrics['misses'],
-                     metrics['false_alarms'], metrics['variability'],
-                     metrics['accuracy'], correct_rts_str))
-        conn.commit()
+def save_session_async(user_id, metrics, trials=None):
+    """Сессия, пробы и streak одной транзакцией в фоновом потоке записи.
+
+    Возвращает Future с результатом update_streak — экран результатов
+    опрашивает его, не блокируя отрисовку.
+    """
+    def on_done(future):
+        if future.exception() is not None:
+            print(f"❌ Ошибка сохранения сессии: {future.exception()}")
+            return
+        chart_cache.invalidate(user_id)
         print(f"✅ Сессия успешно сохранена! RT = {metrics['avg_rt']} мс")
-        return True
-    except Exception as e:
-        print(f"❌ Ошибка сохранения сессии: {e}")
-        return False
-    finally:
-        conn.close()
+        streak = future.result()[1]
+        if streak:
+            user_states.update(user_id, streak=streak[0], last_training_date=streak[1])
+
+    future = session_writer.submit(lambda cur: write_session(cur, user_id, metrics, trials),
+                                   lambda cur: update_streak(cur, user_id))
+    future.add_done_callback(on_done)
+    return future
 
 def get_user_sessions(user_id):
     if not user_id: return []
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     try:
         cur = conn.cursor()
         cur.execute('''SELECT date, avg_rt, misses, false_alarms, variability, accuracy 
@@ -112,33 +102,48 @@ def get_user_sessions(user_id):
             'false_alarms': r[3], 'variability': r[4], 'accuracy': r[5]
         } for r in rows]
     finally:
-        conn.close()
+        cur.close()
 
-def get_leaderboard():
-    conn = sqlite3.connect('reaction_trainer.db')
-    cur = conn.cursor()
+def get_chart_watermark(user_id):
+    """(id последней сессии, число сессий) из user_stats — версия графиков пользователя"""
+    row = get_connection().execute("SELECT last_session_id, session_count FROM user_stats WHERE user_id = ?",
+                                   (user_id,)).fetchone()
+    return (row[0], row[1]) if row else (None, 0)
+
+def get_user_sessions_page(user_id, limit=HISTORY_PAGE_SIZE, before=None):
+    """Страница истории, новые сверху.
+
+    before — курсор (date, id) последней уже загруженной сессии; запрос идёт
+    по индексу idx_sessions_user_date и стоит O(limit) при любой длине истории.
+    """
+    if not user_id: return []
+    conn = get_connection()
     try:
-        cur.execute('''
-            SELECT 
-                u.username,
-                AVG(s.avg_rt) as avg_rt,
-                AVG(s.misses + s.false_alarms) as avg_errors,
-                AVG(s.accuracy) as avg_accuracy
-            FROM users u
-            JOIN sessions s ON u.id = s.user_id
-            GROUP BY u.id, u.username
-            HAVING COUNT(s.id) >= 1
-            ORDER BY avg_rt ASC
-            LIMIT 5
-        ''')
-        leaders = cur.fetchall()
-        # Результат: [(username, avg_rt, avg_errors, avg_accuracy), ...]
-        return leaders
-    except Exception as e:
-        print("Ошибка при получении лидерборда:", e)
-        return []
+        cur = conn.cursor()
+        if before is None:
+            cur.execute('''SELECT id, date, avg_rt, misses, false_alarms, variability, accuracy
+                           FROM sessions WHERE user_id = ?
+                           ORDER BY date DESC, id DESC LIMIT ?''', (user_id, limit))
+        else:
+            before_date, before_id = before
+            cur.execute('''SELECT id, date, avg_rt, misses, false_alarms, variability, accuracy
+                           FROM sessions WHERE user_id = ?
+                             AND date <= ? AND (date < ? OR id < ?)
+                           ORDER BY date DESC, id DESC LIMIT ?''',
+                        (user_id, before_date, before_date, before_id, limit))
+        rows = cur.fetchall()
+        return [{
+            'id': r[0], 'date': r[1], 'avg_rt': r[2], 'misses': r[3],
+            'false_alarms': r[4], 'variability': r[5], 'accuracy': r[6]
+        } for r in rows]
     finally:
-        conn.close()
+        cur.close()
+
+def get_session_rts(session_id):
+    """Времена правильных Go-реакций сессии (понимает и BLOB, и старый JSON)"""
+    row = get_connection().execute("SELECT correct_rts FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    return decode_rts(row[0]) if row else []
+
 # ====================== КНОПКА ======================
 class Button:
     def __init__(self, x, y, w, h, text, color, hover_color, font_size=36):
@@ -146,13 +151,13 @@ class Button:
         self.text = text
         self.color = color
         self.hover_color = hover_color
-        self.font = pygame.font.Font(None, font_size)
+        self.font = get_font(font_size)
 
     def draw(self, screen):
         color = self.hover_color if self.rect.collidepoint(pygame.mouse.get_pos()) else self.color
         pygame.draw.rect(screen, color, self.rect, border_radius=12)
         pygame.draw.rect(screen, (255, 255, 255), self.rect, 3, border_radius=12)
-        txt = self.font.render(self.text, True, (255, 255, 255))
+        txt = render_text(self.font, self.text, (255, 255, 255))
         screen.blit(txt, txt.get_rect(center=self.rect.center))
 
     def clicked(self, pos):
@@ -161,21 +166,22 @@ class Button:
 # ====================== ГЛАВНЫЙ КЛАСС ======================
 class ReactionTrainer:
     def __init__(self):
-        self.pdfGen = ReactionReportGenerator()
         pygame.init()
         self.screen = pygame.display.set_mode((1000, 700))
         self.anonymous_mode = False  # по умолчанию выкл
-        self.font_emoji = pygame.font.SysFont("segoeuisymbol", 40)  # или "segoe ui emoji", "arial unicode ms"
-        self.font_emoji2 = pygame.font.SysFont("segoeuisymbol", 20)  # или "segoe ui emoji", "arial unicode ms"
-        self.font_table = pygame.font.SysFont("arial", 28)
+        self.font_emoji = get_sysfont("segoeuisymbol", 40)  # или "segoe ui emoji", "arial unicode ms"
+        self.font_emoji2 = get_sysfont("segoeuisymbol", 20)  # или "segoe ui emoji", "arial unicode ms"
+        self.font_table = get_sysfont("arial", 28)
         pygame.display.set_caption("Go/No-Go Reaction Trainer")
         self.clock = pygame.time.Clock()
-        self.big_font = pygame.font.Font(None, 74)
-        self.med_font = pygame.font.Font(None, 48)
-        self.small_font = pygame.font.Font(None, 36)
+        self.big_font = get_font(74)
+        self.med_font = get_font(48)
+        self.small_font = get_font(36)
         self.user_id = None
         self.username = None
+        self.stimuli = None  # кадры проб, строятся перед первой тренировкой
         init_db()  # ← сразу при запуске
+        chart_cache.set_disk_dir(CHART_CACHE_DIR)
 
     def get_user_credentials(self):
         username = ""
@@ -187,8 +193,31 @@ class ReactionTrainer:
         attempts = 0
         MAX_ATTEMPTS = 5
 
+        idle = IdleScreen(name='login')
         while True:
-            for event in pygame.event.get():
+            if idle.dirty:
+                # Отрисовка
+                self.screen.fill((20, 20, 40))
+
+                if input_stage == "username":
+                    prompt = render_text(self.med_font, "Введите имя пользователя:", (255, 255, 255))
+                    value = render_text(self.med_font, username + "_", (0, 255, 100))
+                else:
+                    prompt_text = "Введите пароль:" if mode == "login" else "Придумайте пароль:"
+                    prompt = render_text(self.med_font, prompt_text, (255, 255, 255))
+                    # показываем звёздочки вместо пароля
+                    masked = "*" * len(password) + "_"
+                    value = render_text(self.med_font, masked, (0, 255, 100))
+
+                self.screen.blit(prompt, (250, 200))
+                self.screen.blit(value, (250, 280))
+
+                if input_stage == "password" and mode == "login" and attempts > 0:
+                    attempt_text = f"Неверный пароль. Попытка {attempts}/{MAX_ATTEMPTS}"
+                    attempt_surf = render_text(self.small_font, attempt_text, (255, 150, 150))
+                    self.screen.blit(attempt_surf, (250, 350))
+
+            for event in idle.events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -199,11 +228,10 @@ class ReactionTrainer:
                             if not username.strip():
                                 continue
                             # проверяем существование пользователя
-                            conn = sqlite3.connect('reaction_trainer.db')
+                            conn = get_connection()
                             cur = conn.cursor()
                             cur.execute("SELECT id, password FROM users WHERE username = ?", (username,))
                             row = cur.fetchone()
-                            conn.close()
 
                             if row:
                                 # пользователь существует → переходим к вводу пароля
@@ -222,11 +250,10 @@ class ReactionTrainer:
 
                             if mode == "login":
                                 # проверка пароля
-                                conn = sqlite3.connect('reaction_trainer.db')
+                                conn = get_connection()
                                 cur = conn.cursor()
                                 cur.execute("SELECT password FROM users WHERE id = ?", (self.user_id,))
                                 stored = cur.fetchone()[0]
-                                conn.close()
 
                                 if password == stored:
                                     # успех
@@ -243,7 +270,7 @@ class ReactionTrainer:
                                     self.show_message("Неверный пароль. Попробуйте снова.")
                             else:  # register
                                 # сохраняем нового пользователя
-                                conn = sqlite3.connect('reaction_trainer.db')
+                                conn = get_connection()
                                 cur = conn.cursor()
                                 try:
                                     cur.execute("INSERT INTO users (username, password) VALUES (?, ?)",
@@ -252,13 +279,14 @@ class ReactionTrainer:
                                     self.user_id = cur.lastrowid
                                     return username
                                 except sqlite3.IntegrityError:
+                                    conn.rollback()
                                     # имя уже занято (race condition)
                                     self.show_message("Это имя уже занято. Попробуйте другое.")
                                     username = ""
                                     password = ""
                                     input_stage = "username"
                                 finally:
-                                    conn.close()
+                                    cur.close()
 
                     elif event.key == pygame.K_BACKSPACE:
                         if input_stage == "username":
@@ -274,29 +302,115 @@ class ReactionTrainer:
                             if len(password) < 30:
                                 password += event.unicode
 
-            # Отрисовка
-            self.screen.fill((20, 20, 40))
+    def style_anon_button(self, btn):
+        """Текст и цвет кнопки анонимности по текущему режиму"""
+        btn.text = f"Анонимность: {'Вкл' if self.anonymous_mode else 'Выкл'}"
+        btn.color = (0, 255, 0) if self.anonymous_mode else (255, 0, 0)
+        btn.hover_color = (0, 220, 0) if self.anonymous_mode else (220, 0, 0)
+
+    def streak_sprite(self, streak):
+        """Пульсирующий огонёк со стриком: 10 кадров по 200 мс (±8%), строится раз на значение"""
+        def build():
+            streak_surf = render_text(self.font_emoji, f"🔥 {streak}", (255, 215, 0))
+            return AnimatedSprite(pulse_frames(streak_surf, steps=10, amplitude=0.08), frame_ms=200)
+        return sprite_cache.get(('streak', streak), build)
+
+    def spinner_sprite(self):
+        """Индикатор загрузки: 12 кадров по 80 мс, строится один раз"""
+        return sprite_cache.get(('spinner',), lambda: AnimatedSprite(spinner_frames(28, (0, 160, 255)), frame_ms=80))
+
+    def chart_screen(self, name, key, build, positions, max_scroll, scroll_speed, back_btn):
+        """Экран с графиками plot.Plot, положения — positions (левый верхний угол каждого).
+
+        Колёсико — прокрутка страницы, Ctrl+колёсико или +/− — масштаб по X,
+        перетаскивание, горизонтальное колёсико или ←/→ — сдвиг, Home — вся история.
+        Графики во весь диапазон лежат в chart_cache по ключу key: повторный вход
+        не трогает базу, а build() → (XView, [Plot, ...]) вызывается только
+        при промахе или при первом масштабировании.
+        """
+        layers = chart_cache.lookup(*key)
+        view, plots = (None, None) if layers else build()
+        if layers is None:
+            layers = chart_cache.put(*key, [p.surface() for p in plots])
+
+        hint = render_text(get_font(24), "Ctrl+колёсико, +/− — масштаб;  перетаскивание, стрелки — сдвиг;  Home — всё",
+                           (150, 150, 170))
+        scroll_y = 0
+        dragging = None  # (график, x мыши в прошлом событии)
+        last_ticks = pygame.time.get_ticks()
+
+        def ensure_plots():
+            # сессии нужны только для масштаба и сдвига
+            nonlocal view, plots
+            if plots is None:
+                view, plots = build()
 
-            if input_stage == "username":
-                prompt = self.med_font.render("Введите имя пользователя:", True, (255, 255, 255))
-                value = self.med_font.render(username + "_", True, (0, 255, 100))
-            else:
-                prompt_text = "Введите пароль:" if mode == "login" else "Придумайте пароль:"
-                prompt = self.med_font.render(prompt_text, True, (255, 255, 255))
-                # показываем звёздочки вместо пароля
-                masked = "*" * len(password) + "_"
-                value = self.med_font.render(masked, True, (0, 255, 100))
+        idle = IdleScreen([back_btn], name=name)
+        while True:
+            ticks = pygame.time.get_ticks()
+            if view is not None and view.step(ticks - last_ticks):
+                idle.invalidate()
+            last_ticks = ticks
+            rects = [pygame.Rect((x, y + scroll_y), layer.get_size()) for (x, y), layer in zip(positions, layers)]
+
+            if idle.dirty:
+                # во весь диапазон — готовые слои из кэша, иначе текущий вид графиков
+                shown = layers if view is None or view.is_full else [p.surface() for p in plots]
+                self.screen.fill((20, 20, 40))
+                self.screen.blit(hint, hint.get_rect(midtop=(self.screen.get_width() // 2, 40 + scroll_y)))
+                for layer, rect in zip(shown, rects):
+                    self.screen.blit(layer, rect)
 
-            self.screen.blit(prompt, (250, 200))
-            self.screen.blit(value, (250, 280))
+                # Кнопка появляется ТОЛЬКО когда прокручено до конца
+                if scroll_y <= max_scroll:
+                    back_btn.draw(self.screen)
 
-            if input_stage == "password" and mode == "login" and attempts > 0:
-                attempt_text = f"Неверный пароль. Попытка {attempts}/{MAX_ATTEMPTS}"
-                attempt_surf = self.small_font.render(attempt_text, True, (255, 150, 150))
-                self.screen.blit(attempt_surf, (250, 350))
+            # пока идёт плавный переход — кадр за кадром, иначе спим до события
+            for event in idle.events(16 if view is not None and view.animating else IDLE_TIMEOUT_MS):
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                pos = getattr(event, 'pos', None) or pygame.mouse.get_pos()
+                hit = next((i for i, rect in enumerate(rects) if rect.collidepoint(pos)), None)
 
-            pygame.display.flip()
-            self.clock.tick(30)
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    # Кнопка активна ТОЛЬКО если прокручено до конца
+                    if scroll_y <= max_scroll and back_btn.clicked(event.pos):
+                        return
+                    if hit is not None:
+                        ensure_plots()
+                        dragging = (plots[hit], event.pos[0])
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    dragging = None
+                elif event.type == pygame.MOUSEMOTION and dragging is not None:
+                    plot, last_x = dragging
+                    view.pan(plot.pixels_to_x(last_x - event.pos[0]), immediate=True)
+                    dragging = (plot, event.pos[0])
+                    idle.invalidate()
+                elif event.type == pygame.MOUSEWHEEL:
+                    if hit is not None and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        ensure_plots()
+                        view.zoom(0.8 ** event.y, plots[hit].x_at(pos[0] - rects[hit].x))
+                    elif hit is not None and event.x:
+                        ensure_plots()
+                        view.pan(view.span * 0.1 * event.x)
+                    else:
+                        scroll_y += event.y * scroll_speed
+                        scroll_y = min(0, max(max_scroll, scroll_y))  # ограничиваем
+                elif event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_PLUS, pygame.K_EQUALS,
+                                     pygame.K_KP_PLUS, pygame.K_MINUS, pygame.K_KP_MINUS):
+                        ensure_plots()
+                    if event.key == pygame.K_LEFT:
+                        view.pan(-view.span * 0.2)
+                    elif event.key == pygame.K_RIGHT:
+                        view.pan(view.span * 0.2)
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        view.zoom(0.8)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        view.zoom(1.25)
+                    elif event.key == pygame.K_HOME and view is not None:
+                        view.reset()
 
     def run(self):
         self.username = self.get_user_credentials()
@@ -307,6 +421,9 @@ class ReactionTrainer:
             pygame.quit()
             sys.exit()
 
+        if user_states.load(self.user_id) is None:
+            print("Пользователь не найден в базе!")
+
         buttons = [
             Button(350, 120, 300, 70, "Новая тренировка", (0, 120, 215), (0, 160, 255)),
             Button(350, 210, 300, 70, "История", (0, 120, 215), (0, 160, 255)),
@@ -315,56 +432,45 @@ class ReactionTrainer:
             Button(350, 480, 300, 70, "Лидерборд", (0, 120, 215), (0, 160, 255)),
             Button(350, 570, 300, 70, "Выход", (180, 0, 0), (220, 0, 0)),
         ]
-
+        # Кнопка Анонимность — ПРАВЫЙ НИЖНИЙ УГОЛ; создаётся один раз, при переключении меняем текст и цвет
+        anon_btn = Button(
+            self.screen.get_width() - 320,  # правый край минус ширина кнопки
+            self.screen.get_height() - 110,  # нижний край минус высота кнопки + запас
+            300, 60, "", (0, 0, 0), (0, 0, 0)
+        )
+        self.style_anon_button(anon_btn)
+
+        # Огонёк streak в правом верхнем углу — единственное, что меняется без ввода
+        streak_anchor = {'topright': (self.screen.get_width() - 20, 20)}
+        pulse_step = None
+
+        idle = IdleScreen(buttons + [anon_btn], name='menu')
         while True:
-            self.screen.fill((20, 20, 40))
-            self.screen.blit(self.big_font.render("Go/No-Go Тренажёр", True, (255, 255, 255)), (220, 40))
-
-            for btn in buttons:
-                btn.draw(self.screen)
-
-            # Кнопка Анонимность — ПРАВЫЙ НИЖНИЙ УГОЛ
-            anon_text = f"Анонимность: {'Вкл' if self.anonymous_mode else 'Выкл'}"
-            anon_color = (0, 255, 0) if self.anonymous_mode else (255, 0, 0)
-            anon_hover = (0, 220, 0) if self.anonymous_mode else (220, 0, 0)
-            anon_btn = Button(
-                self.screen.get_width() - 320,  # правый край минус ширина кнопки
-                self.screen.get_height() - 110,  # нижний край минус высота кнопки + запас
-                300, 60,
-                anon_text,
-                anon_color,
-                anon_hover
-            )
-            anon_btn.draw(self.screen)
-
-            # Получаем текущий streak
-            conn = sqlite3.connect('reaction_trainer.db')
-            cur = conn.cursor()
-            cur.execute("SELECT streak FROM users WHERE id = ?", (self.user_id,))
-            row = cur.fetchone()
-            if row is None:
-                # обработка случая "пользователь не найден"
-                print("Пользователь не найден в базе!")
-                streak = 0  # или raise ошибка, или return
-            else:
-                streak = row[0]
-            conn.close()
-
-            # Огонёк в правом верхнем углу
-            streak_text = f"🔥 {streak}" if streak > 0 else "🔥 0"
-            streak_surf = self.font_emoji.render(streak_text, True, (255, 215, 0))
-
-            # Пульсация (анимация)
-            pulse = (pygame.time.get_ticks() // 200 % 10) / 10.0  # 0..1
-            scale = 1.0 + pulse * 0.08  # пульсация ±8%
-            streak_surf_scaled = pygame.transform.rotozoom(streak_surf, 0, scale)
-
-            # Центрируем с учётом масштаба
-            x = self.screen.get_width() - streak_surf_scaled.get_width() - 20
-            y = 20
-            self.screen.blit(streak_surf_scaled, (x, y))
-
-            for e in pygame.event.get():
+            # Текущий streak — из кэша, без запросов к базе на каждом кадре
+            state = user_states.get(self.user_id)
+            streak_sprite = self.streak_sprite(state['streak'] if state else 0)
+
+            # Пульсация: при смене кадра перерисовываем только угол с огоньком
+            ticks = pygame.time.get_ticks()
+            step = streak_sprite.frame_index(ticks)
+            if step != pulse_step:
+                pulse_step = step
+                idle.invalidate(streak_sprite.bounds(**streak_anchor))
+
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
+                self.screen.blit(render_text(self.big_font, "Go/No-Go Тренажёр", (255, 255, 255)), (220, 40))
+
+                for btn in buttons:
+                    btn.draw(self.screen)
+
+                anon_btn.draw(self.screen)
+
+                # Огонёк в правом верхнем углу — готовый кадр пульсации
+                streak_sprite.draw(self.screen, ticks, **streak_anchor)
+
+            # просыпаемся к следующему кадру пульсации
+            for e in idle.events(streak_sprite.ms_to_next_frame(ticks)):
                 if e.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -382,188 +488,80 @@ class ReactionTrainer:
                         self.show_leaderboard()
                     elif anon_btn.clicked(pos):  # клик по анонимности
                         self.anonymous_mode = not self.anonymous_mode
-                        # Пересоздаём кнопку анонимности, чтобы обновить цвет и текст
-                        anon_text = f"Анонимность: {'Вкл' if self.anonymous_mode else 'Выкл'}"
-                        anon_color = (0, 255, 0) if self.anonymous_mode else (255, 0, 0)
-                        anon_hover = (0, 220, 0) if self.anonymous_mode else (220, 0, 0)
-                        anon_btn = Button(
-                            self.screen.get_width() - 320,
-                            self.screen.get_height() - 110,
-                            300, 60,
-                            anon_text,
-                            anon_color,
-                            anon_hover
-                        )
+                        self.style_anon_button(anon_btn)
                     elif buttons[5].clicked(pos):
                         pygame.quit()
                         sys.exit()
-
-            pygame.display.flip()
-            self.clock.tick(30)
+                    # вернулись с другого экрана — подхватываем чужие изменения (editor.py и т.п.)
+                    user_states.refresh_if_changed()
 
     # ====================== ТРЕНИРОВКА ======================
     def run_training_session(self):
-        num_trials = 60
-        go_prob = 0.70
-        timeout_ms = 800
-        results = []
+        # план проб (Go/No-Go и паузы) готов до старта; зерно сохраняется с сессией
+        plan = build_schedule()
 
         print("🚀 Тренировка началась...")
-
-        for trial in range(num_trials):
-            is_go = random.random() < go_prob
-
-            # Фиксация — тёмный экран
-            iti = random.randint(600, 1100)
-            start_iti = pygame.time.get_ticks()
-            while pygame.time.get_ticks() - start_iti < iti:
-                for e in pygame.event.get():
-                    if e.type == pygame.QUIT:
-                        pygame.quit()
-                        sys.exit()
-                self.screen.fill((20, 20, 40))
-                pygame.display.flip()
-                self.clock.tick(60)
-
-            # ────────────────────────────────────────────────
-            # СТИМУЛ — рабочая версия с гарантированной отрисовкой
-            # ────────────────────────────────────────────────
-            responded = False
-            rt = None
-            stim_rect = None
-
-            stim_start = pygame.time.get_ticks()  # ← отсчёт начинается здесь
-
-            while pygame.time.get_ticks() - stim_start < timeout_ms:
-                for e in pygame.event.get():
-                    if e.type == pygame.QUIT:
-                        pygame.quit()
-                        sys.exit()
-                    if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and not responded:
-                        mouse_pos = e.pos
-                        if stim_rect and stim_rect.collidepoint(mouse_pos):
-                            responded = True
-                            rt = pygame.time.get_ticks() - stim_start
-
-                # Отрисовка каждый кадр
-                self.screen.fill((20, 20, 40))
-
-                if is_go:
-                    stim_rect = pygame.draw.circle(self.screen, (0, 255, 80), (500, 350), 110)
-                    txt = self.big_font.render("GO", True, (0, 0, 0))
-                    self.screen.blit(txt, (460, 325))
-                else:
-                    stim_rect = pygame.Rect(390, 240, 220, 220)
-                    pygame.draw.rect(self.screen, (255, 50, 50), stim_rect)
-                    txt = self.big_font.render("NO GO", True, (0, 0, 0))
-                    self.screen.blit(txt, (415, 325))
-
-                pygame.display.flip()
-                self.clock.tick(60)
-
-            # Если не нажали — rt остаётся None
-            correct = (is_go and responded) or (not is_go and not responded)
-            results.append({'is_go': is_go, 'rt': rt, 'correct': correct})
-
-            # Обратная связь
-            self.screen.fill((20, 20, 40))
-            if correct:
-                fb = self.big_font.render("Правильно!", True, (0, 255, 100))
-                self.screen.blit(fb, (350, 320))
-            else:
-                fb = self.big_font.render("Неправильно!", True, (255, 80, 80))
-                self.screen.blit(fb, (330, 320))
-            
-            pygame.display.flip()
-            pygame.time.wait(400)
+        # все кадры проб готовы заранее — в цикле только blit
+        if self.stimuli is None:
+            self.stimuli = StimulusAssets(self.screen.get_size(), self.big_font)
+        # фиксация → стимул → обратная связь, один цикл с дедлайнами фаз
+        session = TrainingSession(self.screen, self.stimuli, plan)
+        stats_mark = frame_stats.mark()
+        results = session.run()
+        if session.budget_overruns:
+            print(f"⚠️ Вывод кадра не уложился в бюджет {session.budget_overruns} раз(а)")
 
         # ====================== РАСЧЁТ МЕТРИК ======================
-        correct_go_rts = [r['rt'] for r in results if r['is_go'] and r['correct'] and r['rt'] is not None]
-
-        avg_rt = sum(correct_go_rts) / len(correct_go_rts) if correct_go_rts else 0.0
-        variability = (sum((x - avg_rt) ** 2 for x in correct_go_rts) / len(correct_go_rts)) ** 0.5 if len(
-            correct_go_rts) > 1 else 0.0
-        misses = sum(1 for r in results if r['is_go'] and not r['correct'])
-        false_alarms = sum(1 for r in results if not r['is_go'] and not r['correct'])
-        accuracy = (sum(1 for r in results if r['correct']) / num_trials * 100) if num_trials else 0.0
-
-        metrics = {
-            'avg_rt': round(avg_rt, 1),
-            'misses': misses,
-            'false_alarms': false_alarms,
-            'variability': round(variability, 1),
-            'accuracy': round(accuracy, 1),
-            'correct_rts': correct_go_rts
-        }
+        metrics = session_metrics(results)
+        metrics['schedule_seed'] = plan.seed
+        metrics['schedule_params'] = plan.params_json()
+        # p50/p95/p99 кадров и задержек по фазам проб — сохраняются с сессией
+        metrics['frame_stats'] = frame_stats.summary_json(since=stats_mark, screens=PHASES)
 
         # ====================== СОХРАНЕНИЕ ======================
-        saved = save_session(self.user_id, metrics)
-
-        # Обновляем streak после успешного сохранения сессии
-        from datetime import datetime, timedelta
-
-        today = datetime.now().strftime('%Y-%m-%d')
-
-        conn = sqlite3.connect('reaction_trainer.db')
-        cur = conn.cursor()
+        # сессия, пробы и streak пишутся в фоне одной транзакцией
+        save_future = save_session_async(self.user_id, metrics, trials=results)
 
-        cur.execute("SELECT last_training_date, streak FROM users WHERE id = ?", (self.user_id,))
-        row = cur.fetchone()
+        # ====================== ПОКАЗ РЕЗУЛЬТАТОВ ======================
+        self.show_session_results(metrics, save_future)
 
-        if row:
-            last_date_str, current_streak = row
-            if last_date_str:
-                last_date = datetime.strptime(last_date_str, '%Y-%m-%d').date()
-                today_date = datetime.now().date()
+    def show_session_results(self, metrics, save_future):
+        back_btn = Button(380, 520, 240, 70, "Назад в меню", (0, 120, 215), (0, 160, 255))
+        status_area = pygame.Rect(0, 90, self.screen.get_width(), 50)
+        shown_done = save_future.done()
 
-                if today_date == last_date:
-                    # сегодня уже была тренировка — streak не меняется
-                    pass
-                elif today_date == last_date + timedelta(days=1):
-                    # вчера была → увеличиваем streak
-                    current_streak += 1
-                else:
-                    # пропущен день или больше — сбрасываем на 1
-                    current_streak = 1
-            else:
-                # первая тренировка
-                current_streak = 1
+        idle = IdleScreen([back_btn], name='results')
+        while True:
+            # запись идёт в фоне — только проверяем состояние, не ждём
+            if save_future.done() != shown_done:
+                shown_done = save_future.done()
+                idle.invalidate(status_area)
 
-            cur.execute("""
-                UPDATE users 
-                SET last_training_date = ?, streak = ? 
-                WHERE id = ?
-            """, (today, current_streak, self.user_id))
-            conn.commit()
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
 
-        conn.close()
+                if not shown_done:
+                    status = render_text(self.small_font, "Сохранение результатов...", (180, 180, 220))
+                    self.screen.blit(status, (280, 100))
+                elif save_future.exception() is not None:
+                    err = render_text(self.small_font, "⚠️ Ошибка сохранения в БД!", (255, 80, 80))
+                    self.screen.blit(err, (280, 100))
+
+                lines = [
+                    f"Среднее время реакции: {metrics['avg_rt']} мс",
+                    f"Пропуски: {metrics['misses']}",
+                    f"Ложные нажатия: {metrics['false_alarms']}",
+                    f"Вариабельность: {metrics['variability']} мс",
+                    f"Точность: {metrics['accuracy']}%"
+                ]
+                for i, line in enumerate(lines):
+                    txt = render_text(self.small_font, line, (255, 255, 255))
+                    self.screen.blit(txt, (180, 180 + i * 55))
 
-        # ====================== ПОКАЗ РЕЗУЛЬТАТОВ ======================
-        self.show_session_results(metrics, saved)
+                back_btn.draw(self.screen)
 
-    def show_session_results(self, metrics, saved_ok):
-        while True:
-            self.screen.fill((20, 20, 40))
-
-            if not saved_ok:
-                err = self.small_font.render("⚠️ Ошибка сохранения в БД!", True, (255, 80, 80))
-                self.screen.blit(err, (280, 100))
-
-            lines = [
-                f"Среднее время реакции: {metrics['avg_rt']} мс",
-                f"Пропуски: {metrics['misses']}",
-                f"Ложные нажатия: {metrics['false_alarms']}",
-                f"Вариабельность: {metrics['variability']} мс",
-                f"Точность: {metrics['accuracy']}%"
-            ]
-            for i, line in enumerate(lines):
-                txt = self.small_font.render(line, True, (255, 255, 255))
-                self.screen.blit(txt, (180, 180 + i * 55))
-
-            back_btn = Button(380, 520, 240, 70, "Назад в меню", (0, 120, 215), (0, 160, 255))
-            back_btn.draw(self.screen)
-
-            for e in pygame.event.get():
+            # пока идёт запись — заглядываем в Future чаще
+            for e in idle.events(100 if not shown_done else IDLE_TIMEOUT_MS):
                 if e.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -574,68 +572,112 @@ class ReactionTrainer:
                 if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                     return
 
-            pygame.display.flip()
-            self.clock.tick(30)
-
     # ====================== ОСТАЛЬНЫЕ МЕТОДЫ (без изменений по логике) ======================
     def show_history(self):
-        sessions = get_user_sessions(self.user_id)
-
-        while True:
-            self.screen.fill((20, 20, 40))
+        # история грузится страницами по мере прокрутки (keyset по date, id)
+        sessions = get_user_sessions_page(self.user_id)
+        exhausted = len(sessions) < HISTORY_PAGE_SIZE
 
-            # Заголовок
-            title = self.med_font.render("История тренировок", True, (255, 255, 255))
-            self.screen.blit(title, (320, 40))
+        row_height = 38
+        list_top, list_bottom = 160, 570
+        visible_rows = (list_bottom - list_top) // row_height
+        prefetch_margin = visible_rows  # подгружаем, когда до конца осталось меньше экрана
+        top = 0  # индекс первой видимой строки
 
-            if not sessions:
-                txt = self.small_font.render("Пока нет тренировок", True, (255, 200, 100))
-                self.screen.blit(txt, (320, 300))
-            else:
-                # Заголовок таблицы — чуть крупнее и жирнее
-                header_font = pygame.font.Font(None, 34)
-                header = header_font.render("Дата       Среднее время реакции   Точность   Вариабельность", True,
-                                            (180, 220, 255))
-                self.screen.blit(header, (80, 110))
+        back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
+        # шрифт создаём один раз — иначе кэш текста промахивается на каждом кадре
+        header_font = get_font(34)
 
-                # линия-разделитель
-                pygame.draw.line(self.screen, (120, 120, 160), (70, 145), (920, 145), 2)
-
-                y = 160
-                for sess in sessions[:12]:  # последние 12, чтобы не переполнять экран
-                    date_short = sess['date'][:10].replace('-', '.')
-
-                    rt_text = f"{sess['avg_rt']:.1f} мс" if sess['avg_rt'] > 0 else "—"
-                    acc_text = f"{sess['accuracy']:.1f}%"
-                    var_text = f"{sess['variability']:.1f} мс" if sess['variability'] > 0 else "—"
+        idle = IdleScreen([back_btn], name='history')
+        while True:
+            if not exhausted and top + visible_rows + prefetch_margin >= len(sessions):
+                last = sessions[-1]
+                page = get_user_sessions_page(self.user_id, before=(last['date'], last['id']))
+                sessions.extend(page)
+                exhausted = len(page) < HISTORY_PAGE_SIZE
 
-                    # выравнивание колонок
-                    line = f"{date_short:<10}   {rt_text:>16}   {acc_text:>10}   {var_text:>16}"
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
 
-                    txt = self.small_font.render(line, True, (220, 240, 255))
-                    self.screen.blit(txt, (80, y))
-                    y += 38
+                # Заголовок
+                title = render_text(self.med_font, "История тренировок", (255, 255, 255))
+                self.screen.blit(title, (320, 40))
 
-            # кнопка Назад
-            back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-            back_btn.draw(self.screen)
+                if not sessions:
+                    txt = render_text(self.small_font, "Пока нет тренировок", (255, 200, 100))
+                    self.screen.blit(txt, (320, 300))
+                else:
+                    # Заголовок таблицы — чуть крупнее и жирнее
+                    header = render_text(header_font, "Дата       Среднее время реакции   Точность   Вариабельность",
+                                         (180, 220, 255))
+                    self.screen.blit(header, (80, 110))
+
+                    # линия-разделитель
+                    pygame.draw.line(self.screen, (120, 120, 160), (70, 145), (920, 145), 2)
+
+                    y = list_top
+                    for sess in sessions[top:top + visible_rows]:
+                        date_short = sess['date'][:10].replace('-', '.')
+
+                        rt_text = f"{sess['avg_rt']:.1f} мс" if sess['avg_rt'] > 0 else "—"
+                        acc_text = f"{sess['accuracy']:.1f}%"
+                        var_text = f"{sess['variability']:.1f} мс" if sess['variability'] > 0 else "—"
+
+                        # выравнивание колонок
+                        line = f"{date_short:<10}   {rt_text:>16}   {acc_text:>10}   {var_text:>16}"
+
+                        txt = render_text(self.small_font, line, (220, 240, 255))
+                        self.screen.blit(txt, (80, y))
+                        y += row_height
+
+                    # полоса прокрутки (пока история не загружена до конца — по загруженной части)
+                    if len(sessions) > visible_rows:
+                        track = pygame.Rect(930, list_top, 8, visible_rows * row_height)
+                        pygame.draw.rect(self.screen, (50, 50, 80), track, border_radius=4)
+                        thumb_h = max(20, track.height * visible_rows // len(sessions))
+                        thumb_y = track.y + (track.height - thumb_h) * top // max(1, len(sessions) - visible_rows)
+                        pygame.draw.rect(self.screen, (120, 120, 180), (track.x, thumb_y, track.width, thumb_h),
+                                         border_radius=4)
+
+                # кнопка Назад
+                back_btn.draw(self.screen)
 
-            for event in pygame.event.get():
+            max_top = max(0, len(sessions) - visible_rows)
+            for event in idle.events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if back_btn.clicked(event.pos):
                         return
-
-            pygame.display.flip()
-            self.clock.tick(30)
+                if event.type == pygame.MOUSEWHEEL:
+                    top = min(max_top, max(0, top - event.y * 3))
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_DOWN:
+                        top = min(max_top, top + 1)
+                    elif event.key == pygame.K_UP:
+                        top = max(0, top - 1)
+                    elif event.key == pygame.K_PAGEDOWN:
+                        top = min(max_top, top + visible_rows)
+                    elif event.key == pygame.K_PAGEUP:
+                        top = max(0, top - visible_rows)
+                    elif event.key == pygame.K_ESCAPE:
+                        return
 
     def show_message(self, text, duration=2000, color=(255, 200, 100)):
         start_time = pygame.time.get_ticks()
 
+        idle = IdleScreen(name='message')
         while pygame.time.get_ticks() - start_time < duration:
-            for event in pygame.event.get():
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
+
+                msg_surf = render_text(self.med_font, text, color)
+                msg_rect = msg_surf.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2))
+                self.screen.blit(msg_surf, msg_rect)
+
+            # спим до конца показа или до первого события
+            for event in idle.events(duration - (pygame.time.get_ticks() - start_time)):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -643,76 +685,106 @@ class ReactionTrainer:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     return
 
-            self.screen.fill((20, 20, 40))
-
-            msg_surf = self.med_font.render(text, True, color)
-            msg_rect = msg_surf.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2))
-            self.screen.blit(msg_surf, msg_rect)
-
-            pygame.display.flip()
-            self.clock.tick(60)
-
     def show_leaderboard(self):
-        leaders = get_leaderboard()
-
-        conn = sqlite3.connect('reaction_trainer.db')
-        cur = conn.cursor()
+        sort = 'rt'
+        offset = 0
+        page_size = LEADERBOARD_PAGE_SIZE
+
+        sort_buttons = {
+            'rt': Button(170, 470, 210, 50, "Реакция", (60, 60, 110), (90, 90, 160), font_size=32),
+            'accuracy': Button(395, 470, 210, 50, "Точность", (60, 60, 110), (90, 90, 160), font_size=32),
+            'errors': Button(620, 470, 210, 50, "Ошибки", (60, 60, 110), (90, 90, 160), font_size=32),
+        }
+        prev_btn = Button(250, 580, 110, 70, "<", (0, 120, 215), (0, 160, 255))
+        next_btn = Button(640, 580, 110, 70, ">", (0, 120, 215), (0, 160, 255))
+        back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
 
-        leaders_with_streak = []
-        for username, avg_rt, avg_errors, avg_acc in leaders:
-            cur.execute("SELECT streak FROM users WHERE username = ?", (username,))
-            row = cur.fetchone()
-            streak = row[0] if row else 0
-            leaders_with_streak.append((username, avg_rt, avg_errors, avg_acc, streak))
+        def load():
+            # место, имя, метрики и стрик — одним запросом на страницу
+            page = get_leaderboard_page(sort, page_size, offset)
+            me = get_user_rank(self.user_id, sort)
+            return page, me, count_ranked_users()
 
-        conn.close()
+        leaders, my_row, total = load()
 
+        idle = IdleScreen(list(sort_buttons.values()) + [prev_btn, next_btn, back_btn], name='leaderboard')
         while True:
-            self.screen.fill((20, 20, 40))
-
-            title = self.med_font.render("Топ-5 по скорости реакции", True, (255, 255, 255))
-            self.screen.blit(title, (280, 60))
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
 
-            if not leaders_with_streak:
-                txt = self.small_font.render("Пока нет участников", True, (255, 200, 100))
-                self.screen.blit(txt, (350, 300))
-            else:
-                header = self.font_table.render("№  Имя         Реакция      Ошибки   Точность   Стрик", True,
-                                                (180, 220, 255))
-                self.screen.blit(header, (80, 120))
-                pygame.draw.line(self.screen, (100, 100, 150), (70, 155), (920, 155), 2)
+                sort_label = SORT_KEYS[sort][2]
+                if offset == 0:
+                    title_text = f"Топ-{page_size} {sort_label}"
+                else:
+                    title_text = f"Места {offset + 1}–{offset + len(leaders)} {sort_label}"
+                title = render_text(self.med_font, title_text, (255, 255, 255))
+                self.screen.blit(title, title.get_rect(center=(self.screen.get_width() // 2, 75)))
 
-                y = 170
                 detail_buttons = []  # список для кликабельных квадратиков
 
-                for rank, (username, avg_rt, avg_errors, avg_acc, streak) in enumerate(leaders_with_streak, 1):
-                    color = (255, 215, 0) if rank == 1 else (220, 220, 255)
-
-                    line = f"{rank:<2}  {username:<10} {avg_rt:>6.1f} мс     {avg_errors:>6.1f}      {avg_acc:>6.1f}%"
-                    txt = self.small_font.render(line, True, color)
-                    self.screen.blit(txt, (80, y))
-
-                    # 🔥 стрик (остаётся как было)
-                    streak_text = f"🔥 {streak}"
-                    streak_color = (255, 140, 0) if streak > 0 else (150, 150, 150)
-                    streak_surf = self.font_emoji2.render(streak_text, True, streak_color)
-                    self.screen.blit(streak_surf, (80 + txt.get_width() + 40, y-5))
-
-                    # Маленький квадратик "Подробнее" — теперь 28×28
-                    detail_rect = pygame.Rect(900, y - 3, 24, 24)  # +6 по y для центрирования по строке
-                    pygame.draw.rect(self.screen, (100, 100, 255), detail_rect, border_radius=5)  # закругление меньше
-                    detail_text = self.small_font.render("...", True, (255, 255, 255))
-                    self.screen.blit(detail_text, (detail_rect.centerx - detail_text.get_width() // 2,
-                                                   detail_rect.centery - detail_text.get_height() // 2))
-
-                    detail_buttons.append((detail_rect, username))
-
-                    y += 45
-
-            back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-            back_btn.draw(self.screen)
+                if not leaders:
+                    txt = render_text(self.small_font, "Пока нет участников", (255, 200, 100))
+                    self.screen.blit(txt, (350, 300))
+                else:
+                    header = render_text(self.font_table, "№  Имя         Реакция      Ошибки   Точность   Стрик",
+                                         (180, 220, 255))
+                    self.screen.blit(header, (80, 120))
+                    pygame.draw.line(self.screen, (100, 100, 150), (70, 155), (920, 155), 2)
+
+                    rows = list(leaders)
+                    # своё место показываем отдельной строкой, если его нет на странице
+                    if my_row and not any(row[1] == my_row[1] for row in leaders):
+                        rows.append(my_row)
+
+                    y = 170
+                    for i, (rank, user_id, username, avg_rt, avg_errors, avg_acc, streak) in enumerate(rows):
+                        if user_id == self.user_id:
+                            color = (120, 255, 120)
+                        else:
+                            color = (255, 215, 0) if rank == 1 else (220, 220, 255)
+                        if i == len(leaders):
+                            # разделитель перед строкой «моё место»
+                            pygame.draw.line(self.screen, (100, 100, 150), (70, y - 4), (920, y - 4), 1)
+                            y += 8
+
+                        line = f"{rank:<2}  {username:<10} {avg_rt:>6.1f} мс     {avg_errors:>6.1f}      {avg_acc:>6.1f}%"
+                        txt = render_text(self.small_font, line, color)
+                        self.screen.blit(txt, (80, y))
+
+                        # 🔥 стрик (остаётся как было)
+                        streak_text = f"🔥 {streak}"
+                        streak_color = (255, 140, 0) if streak > 0 else (150, 150, 150)
+                        streak_surf = render_text(self.font_emoji2, streak_text, streak_color)
+                        self.screen.blit(streak_surf, (80 + txt.get_width() + 40, y-5))
+
+                        # Маленький квадратик "Подробнее" — теперь 28×28
+                        detail_rect = pygame.Rect(900, y - 3, 24, 24)  # +6 по y для центрирования по строке
+                        pygame.draw.rect(self.screen, (100, 100, 255), detail_rect, border_radius=5)  # закругление меньше
+                        detail_text = render_text(self.small_font, "...", (255, 255, 255))
+                        self.screen.blit(detail_text, (detail_rect.centerx - detail_text.get_width() // 2,
+                                                       detail_rect.centery - detail_text.get_height() // 2))
+
+                        detail_buttons.append((detail_rect, username))
+
+                        y += 45
+
+                for key, btn in sort_buttons.items():
+                    btn.draw(self.screen)
+                    if key == sort:
+                        pygame.draw.rect(self.screen, (255, 215, 0), btn.rect, 3, border_radius=12)
+
+                has_prev = offset > 0
+                has_next = offset + page_size < total
+                if has_prev:
+                    prev_btn.draw(self.screen)
+                if has_next:
+                    next_btn.draw(self.screen)
+                back_btn.draw(self.screen)
 
-            for event in pygame.event.get():
+            # страница перезагружается после всей пачки событий: остальные
+            # события (QUIT, «Назад») обрабатываются уже с новым состоянием
+            reload = False
+            for event in idle.events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -721,6 +793,23 @@ class ReactionTrainer:
                     if back_btn.clicked(pos):
                         return
 
+                    new_offset, new_sort = offset, sort
+                    if has_prev and prev_btn.clicked(pos):
+                        new_offset = max(0, offset - page_size)
+                    elif has_next and next_btn.clicked(pos):
+                        new_offset = offset + page_size
+                    else:
+                        clicked_sort = next((key for key, btn in sort_buttons.items() if btn.clicked(pos)), None)
+                        if clicked_sort and clicked_sort != sort:
+                            new_offset, new_sort = 0, clicked_sort
+                    if (new_offset, new_sort) != (offset, sort):
+                        offset, sort = new_offset, new_sort
+                        has_prev = offset > 0
+                        has_next = offset + page_size < total
+                        detail_buttons = []  # строки старой страницы больше не на экране
+                        reload = True
+                        continue
+
                     # Проверяем клик по значкам "Подробнее"
                     for rect, username in detail_buttons:
                         if rect.collidepoint(pos):
@@ -730,27 +819,26 @@ class ReactionTrainer:
                             else:
                                 self.show_compare_menu(username)
                             break
-
-            pygame.display.flip()
-            self.clock.tick(30)
+            if reload:
+                leaders, my_row, total = load()
 
     def show_compare_menu(self, other_username):
+        history_btn = Button(300, 200, 400, 80, "Увидеть историю", (0, 180, 0), (0, 220, 0))
+        graphs_btn = Button(300, 300, 400, 80, "Увидеть графики", (0, 120, 215), (0, 160, 255))
+        back_btn = Button(380, 500, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
+        idle = IdleScreen([history_btn, graphs_btn, back_btn], name='compare_menu')
         while True:
-            self.screen.fill((20, 20, 40))
-
-            title = self.med_font.render(f"Сравнение с {other_username}", True, (255, 255, 255))
-            self.screen.blit(title, (290, 100))
-
-            history_btn = Button(300, 200, 400, 80, "Увидеть историю", (0, 180, 0), (0, 220, 0))
-            graphs_btn = Button(300, 300, 400, 80, "Увидеть графики", (0, 120, 215), (0, 160, 255))
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
 
-            history_btn.draw(self.screen)
-            graphs_btn.draw(self.screen)
+                title = render_text(self.med_font, f"Сравнение с {other_username}", (255, 255, 255))
+                self.screen.blit(title, (290, 100))
 
-            back_btn = Button(380, 500, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-            back_btn.draw(self.screen)
+                history_btn.draw(self.screen)
+                graphs_btn.draw(self.screen)
+                back_btn.draw(self.screen)
 
-            for event in pygame.event.get():
+            for event in idle.events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -763,61 +851,60 @@ class ReactionTrainer:
                     elif back_btn.clicked(pos):
                         return
 
-            pygame.display.flip()
-            self.clock.tick(30)
-
     def show_compare_history(self, other_username):
         # Получаем ID другого пользователя
-        conn = sqlite3.connect('reaction_trainer.db')
+        conn = get_connection()
         cur = conn.cursor()
         cur.execute("SELECT id FROM users WHERE username = ?", (other_username,))
         row = cur.fetchone()
         other_id = row[0] if row else None
-        conn.close()
 
         if other_id is None:
             self.show_message("Пользователь не найден", color=(255, 100, 100))
             return
 
-        other_sessions = get_user_sessions(other_id)
-        my_sessions = get_user_sessions(self.user_id)
+        # на экране по 10 последних сессий с каждой стороны — больше и не читаем
+        other_sessions = get_user_sessions_page(other_id, limit=10)
+        my_sessions = get_user_sessions_page(self.user_id, limit=10)
 
         if len(other_sessions) == 0 and len(my_sessions) == 0:
             self.show_message("Нет историй для сравнения", color=(255, 200, 100))
             return
 
+        back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
+        idle = IdleScreen([back_btn], name='compare_history')
         while True:
-            self.screen.fill((20, 20, 40))
+            if idle.dirty:
+                self.screen.fill((20, 20, 40))
 
-            title = self.med_font.render(f"Сравнение истории: {other_username}", True, (255, 255, 255))
-            self.screen.blit(title, (280, 40))
+                title = render_text(self.med_font, f"Сравнение истории: {other_username}", (255, 255, 255))
+                self.screen.blit(title, (280, 40))
 
-            # Левая колонка — чужая история (ближе к левому краю)
-            left_title = self.small_font.render(f"{other_username}", True, (255, 200, 100))
-            self.screen.blit(left_title, (20, 100))
+                # Левая колонка — чужая история (ближе к левому краю)
+                left_title = render_text(self.small_font, f"{other_username}", (255, 200, 100))
+                self.screen.blit(left_title, (20, 100))
 
-            y = 140
-            for sess in other_sessions[:10]:
-                line = f"{sess['date'][:10]} | RT: {sess['avg_rt']:.1f} мс | Acc: {sess['accuracy']:.1f}%"
-                txt = self.small_font.render(line, True, (200, 220, 255))  # светло-синий
-                self.screen.blit(txt, (20, y))
-                y += 35  # расстояние между строками чужой истории
+                y = 140
+                for sess in other_sessions[:10]:
+                    line = f"{sess['date'][:10]} | RT: {sess['avg_rt']:.1f} мс | Acc: {sess['accuracy']:.1f}%"
+                    txt = render_text(self.small_font, line, (200, 220, 255))  # светло-синий
+                    self.screen.blit(txt, (20, y))
+                    y += 35  # расстояние между строками чужой истории
 
-            # Правая колонка — твоя история (другой цвет + большее расстояние)
-            right_title = self.small_font.render("Твоя история", True, (100, 255, 100))
-            self.screen.blit(right_title, (520, 100))
+                # Правая колонка — твоя история (другой цвет + большее расстояние)
+                right_title = render_text(self.small_font, "Твоя история", (100, 255, 100))
+                self.screen.blit(right_title, (520, 100))
 
-            y = 140
-            for sess in my_sessions[:10]:
-                line = f"{sess['date'][:10]} | RT: {sess['avg_rt']:.1f} мс | Acc: {sess['accuracy']:.1f}%"
-                txt = self.small_font.render(line, True, (120, 255, 120))  # ярко-зелёный
-                self.screen.blit(txt, (520, y))
-                y += 35  # большее расстояние между твоими строками
+                y = 140
+                for sess in my_sessions[:10]:
+                    line = f"{sess['date'][:10]} | RT: {sess['avg_rt']:.1f} мс | Acc: {sess['accuracy']:.1f}%"
+                    txt = render_text(self.small_font, line, (120, 255, 120))  # ярко-зелёный
+                    self.screen.blit(txt, (520, y))
+                    y += 35  # большее расстояние между твоими строками
 
-            back_btn = Button(380, 580, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-            back_btn.draw(self.screen)
+                back_btn.draw(self.screen)
 
-            for event in pygame.event.get():
+            for event in idle.events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -825,216 +912,90 @@ class ReactionTrainer:
                     if back_btn.clicked(event.pos):
                         return
 
-            pygame.display.flip()
-            self.clock.tick(30)
-
     def show_compare_graphs(self, other_username):
-        conn = sqlite3.connect('reaction_trainer.db')
+        conn = get_connection()
         cur = conn.cursor()
         cur.execute("SELECT id FROM users WHERE username = ?", (other_username,))
         row = cur.fetchone()
         other_id = row[0] if row else None
-        conn.close()
 
         if other_id is None:
             self.show_message("Пользователь не найден", color=(255, 100, 100))
             return
 
-        other_sessions = get_user_sessions(other_id)
-        my_sessions = get_user_sessions(self.user_id)
+        my_mark = get_chart_watermark(self.user_id)
+        other_mark = get_chart_watermark(other_id)
 
-        if len(other_sessions) < 2 or len(my_sessions) < 2:
+        if my_mark[1] < 2 or other_mark[1] < 2:
             self.show_message("Недостаточно данных для сравнения графиков", color=(255, 200, 100))
             return
 
-        my_sorted = sorted(my_sessions, key=lambda x: x['date'])
-        other_sorted = sorted(other_sessions, key=lambda x: x['date'])
-
-        my_numbers = list(range(1, len(my_sorted) + 1))
-        my_rts = [s['avg_rt'] for s in my_sorted]
-        my_acc = [s['accuracy'] for s in my_sorted]
-
-        other_numbers = list(range(1, len(other_sorted) + 1))
-        other_rts = [s['avg_rt'] for s in other_sorted]
-        other_acc = [s['accuracy'] for s in other_sorted]
-
-        # График (большой размер)
-        plt.figure(figsize=(9.5, 7.0), facecolor='#141428', dpi=180)
-
-        plt.subplot(2, 1, 1)
-        plt.plot(my_numbers, my_rts, marker='o', linewidth=3, color='#00FF9F', label='Ты', markersize=8)
-        plt.plot(other_numbers, other_rts, marker='s', linewidth=3, color='#FF6B6B', label=f'{other_username}',
-                 markersize=8)
-        plt.title('Сравнение среднего времени реакции', fontsize=15, color='white', fontweight='bold')
-        plt.ylabel('Среднее RT (мс)', color='white')
-        plt.tick_params(colors='white', labelsize=11)
-        plt.gca().set_facecolor('#141428')
-        plt.grid(True, alpha=0.3, color='gray')
-        plt.legend(fontsize=10, labelcolor='black')
-
-        plt.subplot(2, 1, 2)
-        plt.plot(my_numbers, my_acc, marker='o', linewidth=3, color='#00FF9F', label='Ты', markersize=8)
-        plt.plot(other_numbers, other_acc, marker='s', linewidth=3, color='#FF6B6B', label=f'{other_username}',
-                 markersize=8)
-        plt.title('Сравнение точности (%)', fontsize=15, color='white', fontweight='bold')
-        plt.xlabel('Номер тренировки', color='white')
-        plt.ylabel('Точность (%)', color='white')
-        plt.tick_params(colors='white', labelsize=11)
-        plt.gca().set_facecolor('#141428')
-        plt.grid(True, alpha=0.3, color='gray')
-        plt.legend(fontsize=10, labelcolor='black')
-
-        plt.tight_layout(pad=1.5)
-
-        graph_path = "temp_compare.png"
-        plt.savefig(graph_path, facecolor='#141428', dpi=180)
-        plt.close()
-
-        try:
-            graph = pygame.image.load(graph_path)
-            graph = pygame.transform.smoothscale(graph, (920, 720))  # большой размер
-        except:
-            graph = None
+        def build():
+            my_sorted = sorted(get_user_sessions(self.user_id), key=lambda x: x['date'])
+            other_sorted = sorted(get_user_sessions(other_id), key=lambda x: x['date'])
+            my_numbers = range(1, len(my_sorted) + 1)
+            other_numbers = range(1, len(other_sorted) + 1)
+            view = XView(1, max(len(my_sorted), len(other_sorted)))
+            plots = []
+            for key, title, xlabel, ylabel in (
+                    ('avg_rt', 'Сравнение среднего времени реакции', None, 'Среднее RT (мс)'),
+                    ('accuracy', 'Сравнение точности (%)', 'Номер тренировки', 'Точность (%)')):
+                plots.append(Plot((920, 360), view, [
+                    Series(my_numbers, [s[key] for s in my_sorted], MY_COLOR, label='Ты', marker='o'),
+                    Series(other_numbers, [s[key] for s in other_sorted], OTHER_COLOR, label=f'{other_username}',
+                           marker='s'),
+                ], title, xlabel, ylabel))
+            return view, plots
 
         # Прокрутка
-        scroll_y = 0
-        scroll_speed = 60  # увеличил скорость для удобства
-        graph_height = 720
         content_top = 80
-        content_bottom = content_top + graph_height + 80  # отступ после второго графика
-        max_scroll = self.screen.get_height() - content_bottom  # когда конец контента виден
-        max_scroll = min(0, max_scroll)  # не больше 0
+        content_bottom = content_top + 720 + 80  # отступ после второго графика
+        max_scroll = min(0, self.screen.get_height() - content_bottom)  # когда конец контента виден
 
         back_btn = Button(380, self.screen.get_height() - 80, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    pos = event.pos
-                    # Кнопка активна ТОЛЬКО если прокручено до конца
-                    if scroll_y <= max_scroll and back_btn.clicked(pos):
-                        return
-                if event.type == pygame.MOUSEWHEEL:
-                    scroll_y += event.y * scroll_speed
-                    scroll_y = min(0, max(max_scroll, scroll_y))  # ограничиваем
-
-            self.screen.fill((20, 20, 40))
-
-            if graph:
-                self.screen.blit(graph, (40, content_top + scroll_y))
-            else:
-                txt = self.med_font.render("Не удалось построить график сравнения", True, (255, 100, 100))
-                self.screen.blit(txt, (200, 300 + scroll_y))
-
-            # Кнопка появляется ТОЛЬКО когда прокручено до конца
-            if scroll_y <= max_scroll:
-                back_btn.draw(self.screen)
-
-            pygame.display.flip()
-            self.clock.tick(60)
+        self.chart_screen('compare_graphs', ('compare_plot', (self.user_id, other_id), (920, 720),
+                                             (my_mark, other_mark)),
+                          build, [(40, content_top), (40, content_top + 360)], max_scroll, 60, back_btn)
 
     def show_progress_graph(self):
-        sessions = get_user_sessions(self.user_id)
+        watermark = get_chart_watermark(self.user_id)
 
-        if len(sessions) < 2:
+        if watermark[1] < 2:
+            back_btn = Button(380, 520, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
+            idle = IdleScreen([back_btn], name='progress_graph')
             while True:
-                self.screen.fill((20, 20, 40))
-                txt = self.med_font.render("Недостаточно данных для графика", True, (255, 200, 100))
-                self.screen.blit(txt, (220, 300))
-                back_btn = Button(380, 520, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-                back_btn.draw(self.screen)
+                if idle.dirty:
+                    self.screen.fill((20, 20, 40))
+                    txt = render_text(self.med_font, "Недостаточно данных для графика", (255, 200, 100))
+                    self.screen.blit(txt, (220, 300))
+                    back_btn.draw(self.screen)
 
-                for event in pygame.event.get():
+                for event in idle.events():
                     if event.type == pygame.QUIT:
                         pygame.quit()
                         sys.exit()
                     if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                         if back_btn.clicked(event.pos):
                             return
-                pygame.display.flip()
-                self.clock.tick(30)
             return
 
-        # Сортируем сессии
-        sessions_sorted = sorted(sessions, key=lambda x: x['date'])
-        training_numbers = list(range(1, len(sessions_sorted) + 1))
-
-        rts = [s['avg_rt'] for s in sessions_sorted]
-        accuracy = [s['accuracy'] for s in sessions_sorted]
-
-        # График 1: Среднее время реакции
-        plt.figure(figsize=(9, 5), facecolor='#141428', dpi=180)
-        plt.plot(training_numbers, rts, marker='o', linewidth=3, color='#00FF9F', markersize=9)
-        plt.title('Прогресс среднего времени реакции', fontsize=16, color='white')
-        plt.xlabel('Номер тренировки', fontsize=12, color='white')
-        plt.ylabel('Среднее RT (мс)', fontsize=12, color='white')
-        plt.tick_params(colors='white', labelsize=10)
-        plt.gca().set_facecolor('#141428')
-        plt.grid(True, alpha=0.3, color='gray', linestyle='--')
-        plt.xticks(training_numbers)
-        plt.tight_layout()
-        plt.savefig("temp_rt.png", facecolor='#141428', dpi=180)
-        plt.close()
-
-        # График 2: Точность
-        plt.figure(figsize=(9, 5), facecolor='#141428', dpi=180)
-        plt.plot(training_numbers, accuracy, marker='s', linewidth=3, color='#4DA6FF', markersize=9)
-        plt.title('Прогресс точности (%)', fontsize=16, color='white')
-        plt.xlabel('Номер тренировки', fontsize=12, color='white')
-        plt.ylabel('Точность (%)', fontsize=12, color='white')
-        plt.tick_params(colors='white', labelsize=10)
-        plt.gca().set_facecolor('#141428')
-        plt.grid(True, alpha=0.3, color='gray', linestyle='--')
-        plt.xticks(training_numbers)
-        plt.tight_layout()
-        plt.savefig("temp_acc.png", facecolor='#141428', dpi=180)
-        plt.close()
-
-        # Загрузка графиков
-        try:
-            graph_rt = pygame.image.load("temp_rt.png")
-            graph_rt = pygame.transform.smoothscale(graph_rt, (860, 480))
-            graph_acc = pygame.image.load("temp_acc.png")
-            graph_acc = pygame.transform.smoothscale(graph_acc, (860, 480))
-        except:
-            graph_rt = graph_acc = None
-
-        # Прокрутка
-        scroll_y = 0
-        scroll_speed = 30
-        max_scroll = -480  # максимальное смещение вниз (высота второго графика)
+        def build():
+            sessions_sorted = sorted(get_user_sessions(self.user_id), key=lambda x: x['date'])
+            numbers = range(1, len(sessions_sorted) + 1)
+            view = XView(1, len(sessions_sorted))
+            rt_plot = Plot((860, 480), view,
+                           [Series(numbers, [s['avg_rt'] for s in sessions_sorted], MY_COLOR, marker='o')],
+                           'Прогресс среднего времени реакции', 'Номер тренировки', 'Среднее RT (мс)',
+                           dashed_grid=True)
+            acc_plot = Plot((860, 480), view,
+                            [Series(numbers, [s['accuracy'] for s in sessions_sorted], ACC_COLOR, marker='s')],
+                            'Прогресс точности (%)', 'Номер тренировки', 'Точность (%)', dashed_grid=True)
+            return view, [rt_plot, acc_plot]
 
         back_btn = Button(380, 600, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
-
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    if back_btn.clicked(event.pos) and scroll_y <= max_scroll:
-                        return  # выход только если прокручено до конца
-                if event.type == pygame.MOUSEWHEEL:
-                    scroll_y += event.y * scroll_speed
-                    scroll_y = min(0, max(max_scroll, scroll_y))  # ограничиваем: от 0 до max_scroll
-
-            self.screen.fill((20, 20, 40))
-
-            # Рисуем графики с учётом прокрутки
-            if graph_rt:
-                self.screen.blit(graph_rt, (70, 80 + scroll_y))
-            if graph_acc:
-                self.screen.blit(graph_acc, (70, 580 + scroll_y))
-
-            # Кнопка "Назад" видна ТОЛЬКО когда прокручено до конца
-            if scroll_y <= max_scroll:
-                back_btn.draw(self.screen)
-
-            pygame.display.flip()
-            self.clock.tick(60)
+        # max_scroll: максимальное смещение вниз (высота второго графика)
+        self.chart_screen('progress_graph', ('progress_plot', (self.user_id,), (860, 480), (watermark,)),
+                          build, [(70, 80), (70, 580)], -480, 30, back_btn)
 
     def generate_pdf_report(self):
         sessions = get_user_sessions(self.user_id)
@@ -1050,79 +1011,52 @@ class ReactionTrainer:
         avg_acc = sum(s['accuracy'] for s in sessions) / len(sessions)
         avg_var = sum(s['variability'] for s in sessions) / len(sessions)
 
-        # Графики
-        training_numbers = list(range(1, len(sessions_sorted) + 1))
-        rts = [s['avg_rt'] for s in sessions_sorted]
-        accuracy = [s['accuracy'] for s in sessions_sorted]
-
-        # График 1 — Время реакции
-        plt.figure(figsize=(7.5, 3.6), facecolor='#141428', dpi=200)
-        plt.plot(training_numbers, rts, marker='o', linewidth=3, color='#00FF9F')
-        plt.title('Прогресс среднего времени реакции', color='white')
-        plt.xlabel('Номер тренировки', color='white')
-        plt.ylabel('RT (мс)', color='white')
-        plt.tick_params(colors='white')
-        plt.grid(True, alpha=0.3)
-        plt.xticks(training_numbers)
-        plt.tight_layout()
-        plt.savefig("temp_rt.png", facecolor='#141428', dpi=200)
-        plt.close()
-
-        # График 2 — Точность
-        plt.figure(figsize=(7.5, 3.6), facecolor='#141428', dpi=200)
-        plt.plot(training_numbers, accuracy, marker='s', linewidth=3, color='#4DA6FF')
-        plt.title('Прогресс точности', color='white')
-        plt.xlabel('Номер тренировки', color='white')
-        plt.ylabel('Точность (%)', color='white')
-        plt.tick_params(colors='white')
-        plt.grid(True, alpha=0.3)
-        plt.xticks(training_numbers)
-        plt.tight_layout()
-        plt.savefig("temp_acc.png", facecolor='#141428', dpi=200)
-        plt.close()
-
-        # PDF
-        pdf = FPDF()
-        pdf.add_page()
-
-        pdf.add_font("Arial", "", r"C:\Windows\Fonts\arial.ttf", uni=True)
-        pdf.add_font("Arial", "B", r"C:\Windows\Fonts\arialbd.ttf", uni=True)
-
-        pdf.set_font("Arial", "B", 20)
-        pdf.cell(0, 15, "Go/No-Go Тренажёр — Отчёт", ln=1, align="C")
-
-        pdf.set_font("Arial", "", 14)
-        pdf.cell(0, 10, f"Пользователь: {self.username}", ln=1)
-        pdf.cell(0, 10, f"Дата: {datetime.now().strftime('%d.%m.%Y %H:%M')}", ln=1)
-        pdf.cell(0, 10, f"Всего тренировок: {len(sessions)}", ln=1)
-        pdf.ln(10)
-
-        pdf.set_font("Arial", "", 13)
-        pdf.cell(0, 10, f"Среднее время реакции: {avg_rt:.1f} мс", ln=1)
-        pdf.cell(0, 10, f"Средняя точность: {avg_acc:.1f}%", ln=1)
-        pdf.cell(0, 10, f"Средняя вариабельность: {avg_var:.1f} мс", ln=1)
-        pdf.ln(15)
-
-        # Графики
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(0, 10, "Прогресс среднего времени реакции", ln=1)
-        if os.path.exists("temp_rt.png"):
-            pdf.image("temp_rt.png", x=10, y=pdf.get_y(), w=190)
-            pdf.ln(95)
+        # Графики — во временные файлы с уникальными именами (FPDF принимает только путь).
+        # matplotlib загружается только здесь: экранам он не нужен
+        from charts import report_charts
+        rt_png, acc_png = report_charts(sessions_sorted)
 
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(0, 10, "Прогресс точности (%)", ln=1)
-        if os.path.exists("temp_acc.png"):
-            pdf.image("temp_acc.png", x=10, y=pdf.get_y(), w=190)
-
-        pdf.output("reaction_report.pdf")
+        try:
+            # PDF
+            pdf = FPDF()
+            pdf.add_page()
+
+            pdf.add_font("Arial", "", r"C:\Windows\Fonts\arial.ttf", uni=True)
+            pdf.add_font("Arial", "B", r"C:\Windows\Fonts\arialbd.ttf", uni=True)
+
+            pdf.set_font("Arial", "B", 20)
+            pdf.cell(0, 15, "Go/No-Go Тренажёр — Отчёт", ln=1, align="C")
+
+            pdf.set_font("Arial", "", 14)
+            pdf.cell(0, 10, f"Пользователь: {self.username}", ln=1)
+            pdf.cell(0, 10, f"Дата: {datetime.now().strftime('%d.%m.%Y %H:%M')}", ln=1)
+            pdf.cell(0, 10, f"Всего тренировок: {len(sessions)}", ln=1)
+            pdf.ln(10)
+
+            pdf.set_font("Arial", "", 13)
+            pdf.cell(0, 10, f"Среднее время реакции: {avg_rt:.1f} мс", ln=1)
+            pdf.cell(0, 10, f"Средняя точность: {avg_acc:.1f}%", ln=1)
+            pdf.cell(0, 10, f"Средняя вариабельность: {avg_var:.1f} мс", ln=1)
+            pdf.ln(15)
+
+            # Графики
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(0, 10, "Прогресс среднего времени реакции", ln=1)
+            pdf.image(rt_png, x=10, y=pdf.get_y(), w=190)
+            pdf.ln(95)
 
-        # Удаляем временные файлы
-        for f in ["temp_rt.png", "temp_acc.png"]:
-            try:
-                os.remove(f)
-            except:
-                pass
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(0, 10, "Прогресс точности (%)", ln=1)
+            pdf.image(acc_png, x=10, y=pdf.get_y(), w=190)
+
+            pdf.output("reaction_report.pdf")
+        finally:
+            # Удаляем временные файлы
+            for f in (rt_png, acc_png):
+                try:
+                    os.remove(f)
+                except:
+                    pass
 
     def get_user_report_data(self):
         sessions = get_user_sessions(self.user_id)
@@ -1186,11 +1120,53 @@ class ReactionTrainer:
             }
         }
         print(data)
-        self.pdfGen.generate_report(data)
+        # PDF собирается в фоновом процессе; окно тем временем показывает индикатор
+        self.wait_for_report(render_service.report('report', data))
         return data
 
+    def wait_for_report(self, job):
+        """Экран ожидания PDF-отчёта. «Назад» снимает задачу, если она ещё не началась"""
+        back_btn = Button(380, 520, 240, 70, "Назад", (0, 120, 215), (0, 160, 255))
+        spinner = self.spinner_sprite()
+        spinner_center = (self.screen.get_width() // 2, 400)
+        spinner_step = None
+
+        idle = IdleScreen([back_btn], name='report')
+        try:
+            while not job.done():
+                ticks = pygame.time.get_ticks()
+                if spinner.frame_index(ticks) != spinner_step:
+                    spinner_step = spinner.frame_index(ticks)
+                    idle.invalidate(spinner.bounds(center=spinner_center))
+
+                if idle.dirty:
+                    self.screen.fill((20, 20, 40))
+                    txt = render_text(self.med_font, "Формируем PDF-отчёт...", (255, 255, 255))
+                    self.screen.blit(txt, txt.get_rect(center=(self.screen.get_width() // 2, 300)))
+                    spinner.draw(self.screen, ticks, center=spinner_center)
+                    back_btn.draw(self.screen)
+
+                for event in idle.events(spinner.ms_to_next_frame(ticks)):
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        if back_btn.clicked(event.pos):
+                            return
+        finally:
+            render_service.cancel('report')
+
+        try:
+            filename = job.result()
+        except Exception as e:
+            print(f"❌ Ошибка создания отчёта: {e}")
+            self.show_message("Не удалось создать отчёт", color=(255, 100, 100))
+            return
+        self.show_message(f"Отчёт сохранён: {filename}", color=(100, 255, 150))
+
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # воркер render_service в сборке PyInstaller не запускает игру заново
     print("=== Go/No-Go Reaction Trainer запущен ===")
     app = ReactionTrainer()
     app.run()
\ No newline at end of file
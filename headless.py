@@ -0,0 +1,235 @@
+"""Безголовый прогон тренировок синтетическими участниками.
+
+Запуск:  python headless.py --users 100 --sessions 20
+Окно не открывается (SDL dummy), время виртуальное — полная сессия из
+60 проб проходит за доли секунды. Каждая сессия идёт через тот же конвейер,
+что и в игре: расписание → TrainingSession → метрики → запись сессии,
+проб, user_stats и streak одной транзакцией. База — отдельный файл
+(по умолчанию headless_trainer.db), её можно оставить (--keep) для
+нагрузочных замеров (bench_db.py и т.п.).
+"""
+import argparse
+import heapq
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+import db
+from fonts import get_font
+from migrations import migrate
+from schedule import build_schedule
+from session_store import write_session
+from stimuli import StimulusAssets
+from streaks import update_streak
+from timing import TimingEngine, NS_PER_MS, ns_to_ms
+from training import TrainingSession, FIXATION, STIMULUS, session_metrics
+
+SCREEN_SIZE = (1000, 700)
+
+
+# ====================== ВИРТУАЛЬНОЕ ВРЕМЯ И ВВОД ======================
+
+class VirtualClock:
+    """Часы, которые не ждут: sleep_ns сразу переводит время вперёд,
+    но не дальше ближайшего запланированного события ввода"""
+
+    def __init__(self):
+        self._now = 0
+        self._wakeups = []
+
+    def now_ns(self):
+        return self._now
+
+    def sleep_ns(self, ns):
+        target = self._now + max(1, int(ns))
+        while self._wakeups and self._wakeups[0] <= self._now:
+            heapq.heappop(self._wakeups)
+        if self._wakeups and self._wakeups[0] < target:
+            target = self._wakeups[0]
+        self._now = target
+
+    def wake_at(self, t_ns):
+        heapq.heappush(self._wakeups, t_ns)
+
+
+class ScriptedInput:
+    """Очередь событий с заданным временем; замена pygame.event.get для TimingEngine"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._queue = []
+        self._counter = 0  # порядок для событий с одинаковым временем
+
+    def post(self, t_ns, event):
+        heapq.heappush(self._queue, (t_ns, self._counter, event))
+        self._counter += 1
+        self.clock.wake_at(t_ns)
+
+    def get(self):
+        now = self.clock.now_ns()
+        events = []
+        while self._queue and self._queue[0][0] <= now:
+            events.append(heapq.heappop(self._queue)[2])
+        return events
+
+
+# ====================== СИНТЕТИЧЕСКИЙ УЧАСТНИК ======================
+
+class SyntheticParticipant:
+    """Ответы по ex-Gaussian модели RT: N(rt_mu, rt_sigma) + Exp(rt_tau), мс"""
+
+    def __init__(self, rng, rt_mu=300.0, rt_sigma=40.0, rt_tau=60.0,
+                 miss_rate=0.05, false_alarm_rate=0.2, anticipation_rate=0.02):
+        self.rng = rng
+        self.rt_mu = rt_mu
+        self.rt_sigma = rt_sigma
+        self.rt_tau = rt_tau
+        self.miss_rate = miss_rate
+        self.false_alarm_rate = false_alarm_rate
+        self.anticipation_rate = anticipation_rate
+
+    def draw_rt(self):
+        return max(80.0, self.rng.normal(self.rt_mu, self.rt_sigma) + self.rng.exponential(self.rt_tau))
+
+    def respond(self, is_go):
+        """RT в мс или None (нет нажатия)"""
+        if is_go:
+            return None if self.rng.random() < self.miss_rate else self.draw_rt()
+        return self.draw_rt() if self.rng.random() < self.false_alarm_rate else None
+
+    def anticipates(self):
+        return self.rng.random() < self.anticipation_rate
+
+
+def _click(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def run_headless_session(screen, stimuli, participant, plan):
+    """Одна тренировка с виртуальным временем. Возвращает (результаты проб, виртуальная длительность, мс)"""
+    clock = VirtualClock()
+    scripted = ScriptedInput(clock)
+    # опрос «бесконечно редкий»: часы сами будят цикл к каждому событию ввода
+    timing = TimingEngine(poll_interval_ms=60_000, clock=clock, event_source=scripted.get)
+
+    def observer(phase, trial, t_ns):
+        if phase == STIMULUS:
+            rt = participant.respond(trial['is_go'])
+            if rt is not None:
+                _, rect = stimuli.stimulus(trial['is_go'])
+                scripted.post(t_ns + int(rt * NS_PER_MS), _click(rect.center))
+        elif phase == FIXATION and participant.anticipates():
+            delay = participant.rng.uniform(0, trial['iti'])
+            scripted.post(t_ns + int(delay * NS_PER_MS), _click((100, 100)))
+
+    session = TrainingSession(screen, stimuli, plan, timing=timing, observer=observer)
+    results = session.run()
+    return results, ns_to_ms(clock.now_ns())
+
+
+def init_display():
+    pygame.display.init()
+    pygame.font.init()
+    return pygame.display.set_mode(SCREEN_SIZE)
+
+
+# ====================== ЗАПУСК ======================
+
+def _summary(samples):
+    if not samples:
+        return "—"
+    p50, p95 = np.percentile(samples, [50, 95])
+    return f"медиана {p50:.2f} мс, p95 {p95:.2f} мс"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=10, help="сессий на пользователя")
+    parser.add_argument('--db', default='headless_trainer.db')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--rt-mean', type=float, default=300.0, help="средний mu ex-Gaussian по участникам")
+    parser.add_argument('--miss-rate', type=float, default=0.05)
+    parser.add_argument('--fa-rate', type=float, default=0.2)
+    parser.add_argument('--keep', action='store_true', help="не удалять файл базы после прогона")
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    conn = db.get_connection(args.db)
+    migrate(conn)
+
+    screen = init_display()
+    stimuli = StimulusAssets(screen.get_size(), get_font(74))
+    rng = np.random.default_rng(args.seed)
+
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    cur.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                    ((f"synthetic{i}", "pass") for i in range(args.users)))
+    conn.commit()
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+
+    sim_ms, write_ms = [], []
+    virtual_total = 0.0
+    start = datetime(2025, 1, 1, 9, 0, 0)
+    t0 = time.perf_counter()
+    for user_id in user_ids:
+        # у каждого участника свои скорость и аккуратность
+        participant = SyntheticParticipant(
+            rng,
+            rt_mu=rng.normal(args.rt_mean, 40),
+            rt_sigma=rng.uniform(25, 55),
+            rt_tau=rng.uniform(30, 90),
+            miss_rate=min(0.5, rng.exponential(args.miss_rate)),
+            false_alarm_rate=min(0.8, rng.exponential(args.fa_rate)),
+        )
+        day = start
+        for _ in range(args.sessions):
+            plan = build_schedule(seed=int(rng.integers(2 ** 63)))
+
+            s0 = time.perf_counter()
+            results, virtual_ms = run_headless_session(screen, stimuli, participant, plan)
+            sim_ms.append((time.perf_counter() - s0) * 1000)
+            virtual_total += virtual_ms
+
+            metrics = session_metrics(results)
+            metrics['schedule_seed'] = plan.seed
+            metrics['schedule_params'] = plan.params_json()
+            date = day.strftime('%Y-%m-%d %H:%M:%S')
+
+            w0 = time.perf_counter()
+            with db.transaction(args.db) as tx:
+                write_session(tx, user_id, metrics, results, date=date)
+                update_streak(tx, user_id, today=date[:10])
+            write_ms.append((time.perf_counter() - w0) * 1000)
+
+            # следующая тренировка — через 1..4 дня (иногда пропуски рвут стрик)
+            day += timedelta(days=int(rng.geometric(0.6)), minutes=int(rng.integers(-120, 120)))
+
+    wall = time.perf_counter() - t0
+    count = len(sim_ms)
+    print(f"Сессий: {count} ({args.users} участников × {args.sessions}) за {wall:.1f} с, "
+          f"{count / wall:.1f} сессий/с")
+    print(f"  ускорение относительно реального времени: ×{virtual_total / 1000 / wall:.0f}")
+    print(f"  симуляция сессии: {_summary(sim_ms)}")
+    print(f"  запись сессии:    {_summary(write_ms)}")
+
+    db.close_all()
+    pygame.quit()
+    if not args.keep:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()
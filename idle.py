@@ -0,0 +1,122 @@
+import time
+
+import pygame
+
+from instrumentation import frame_stats, OVERLAY_KEY
+
+# ====================== ЭКОНОМНАЯ ОТРИСОВКА СТАТИЧНЫХ ЭКРАНОВ ======================
+# Меню, история, лидерборд и т.п. меняются только от действий пользователя,
+# поэтому не крутятся в цикле 30–60 кадров/с, а спят в pygame.event.wait.
+# Перерисовка — только после ввода, смены наведения на кнопку или тика анимации;
+# на экран выводятся только изменившиеся области (display.update(rects)).
+# Экраны проб сюда не относятся — у них свой быстрый цикл.
+# Каждый выведенный кадр записывается в instrumentation.frame_stats под именем экрана.
+# Вложенные экраны (тренировка, графики, история) работают внутри обработчика
+# события родителя: время отрисовки считается от начала перерисовки (чтения dirty),
+# а задержка ввода не записывается, если между событием и кадром успел
+# поработать другой экран — иначе весь вложенный экран попал бы в один кадр.
+
+IDLE_TIMEOUT_MS = 1000  # без анимаций просыпаемся раз в секунду (QUIT всё равно придёт событием)
+
+# события, после которых экран перерисовывается целиком
+_REDRAW_EVENTS = {
+    pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+    pygame.MOUSEWHEEL, pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+    pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWSIZECHANGED,
+}
+
+
+class IdleScreen:
+    """Цикл статичного экрана.
+
+    while True:
+        if idle.dirty:
+            ...рисуем весь кадр в буфер...
+        for event in idle.events(timeout_ms):
+            ...обработка...
+
+    events() выводит на экран только грязные области и засыпает до события.
+    Наведение мыши на кнопки из buttons отслеживается само.
+    """
+
+    def __init__(self, buttons=(), name='screen'):
+        self.name = name
+        self.buttons = list(buttons)
+        self._hovered = {}
+        self._full = True       # нужен полный кадр (flip)
+        self._rects = []        # иначе — только эти области
+        self._returned = time.perf_counter()  # когда events() отдал управление экрану
+        self._returned_seq = frame_stats.mark()
+        self._drawing = None                  # когда началась перерисовка кадра
+        self._woke = None                     # когда пришло событие, на которое отвечает кадр
+
+    @property
+    def dirty(self):
+        """Нужно ли перерисовать кадр в буфере (True — отсчёт отрисовки кадра начат)"""
+        dirty = self._needs_redraw()
+        if dirty and self._drawing is None:
+            self._drawing = time.perf_counter()
+        return dirty
+
+    def _needs_redraw(self):
+        return self._full or bool(self._rects)
+
+    def invalidate(self, rect=None):
+        """Помечает область (или весь экран при rect=None) к перерисовке"""
+        if rect is None:
+            self._full = True
+        elif not self._full:
+            self._rects.append(pygame.Rect(rect))
+
+    def present(self):
+        """Выводит нарисованное: весь кадр или только грязные области"""
+        start = time.perf_counter()
+        if frame_stats.overlay_visible:
+            self._rects.append(frame_stats.draw_overlay(pygame.display.get_surface(), self.name))
+        if self._full:
+            pygame.display.flip()
+        elif self._rects:
+            pygame.display.update(self._rects)
+        end = time.perf_counter()
+        drawing = self._drawing if self._drawing is not None else self._returned
+        latency_ms = None
+        if self._woke is not None and frame_stats.mark() == self._returned_seq:
+            latency_ms = (end - self._woke) * 1000
+        frame_stats.record(self.name,
+                           render_ms=(start - drawing) * 1000,
+                           flip_ms=(end - start) * 1000,
+                           latency_ms=latency_ms)
+        self._drawing = None
+        self._woke = None
+        self._full = False
+        self._rects = []
+
+    def events(self, timeout_ms=IDLE_TIMEOUT_MS):
+        """Выводит кадр и ждёт событий не дольше timeout_ms; возвращает список событий"""
+        if self._needs_redraw():
+            self.present()
+        first = pygame.event.wait(max(1, int(timeout_ms)))
+        events = [] if first.type == pygame.NOEVENT else [first]
+        events.extend(pygame.event.get())
+        if events and self._woke is None:
+            self._woke = time.perf_counter()
+        for event in events:
+            if event.type in _REDRAW_EVENTS:
+                self.invalidate()
+            elif event.type == pygame.MOUSEMOTION:
+                self._track_hover(event.pos)
+            if event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                frame_stats.toggle_overlay()
+        if not self._needs_redraw():
+            self._woke = None  # событие ничего не изменило — кадра в ответ не будет
+        self._drawing = None
+        self._returned = time.perf_counter()
+        self._returned_seq = frame_stats.mark()
+        return events
+
+    def _track_hover(self, pos):
+        for btn in self.buttons:
+            hovered = btn.rect.collidepoint(pos)
+            if self._hovered.get(id(btn), False) != hovered:
+                self._hovered[id(btn)] = hovered
+                self.invalidate(btn.rect)
@@ -0,0 +1,93 @@
+import json
+from collections import deque
+
+import numpy as np
+import pygame
+
+from fonts import get_font
+
+# ====================== ЗАМЕРЫ КАДРОВ И ЗАДЕРЖЕК ======================
+# Каждый выведенный кадр (статичные экраны и фазы проб) оставляет запись
+# в кольцевом буфере фиксированного размера:
+#   screen      — экран или фаза пробы ('menu', 'stimulus', ...)
+#   render_ms   — подготовка кадра до flip (обработка ввода + отрисовка)
+#   flip_ms     — сам flip / display.update
+#   missed      — сколько кадров 60 Гц «проглочено» (render + flip сверх бюджета)
+#   latency_ms  — задержка ввода: от прихода события до показа ответа
+#                 (для проб — окно опроса, в которое попало нажатие)
+#   drift_ms    — насколько фаза пробы закончилась позже своего дедлайна
+# По сессии считаются p50/p95/p99 и сохраняются с ней (sessions.frame_stats).
+# F3 включает оверлей с текущими цифрами.
+
+CAPACITY = 4096
+FRAME_BUDGET_MS = 1000 / 60
+OVERLAY_KEY = pygame.K_F3
+PERCENTILES = (50, 95, 99)
+
+_FIELDS = ('render_ms', 'flip_ms', 'latency_ms', 'drift_ms')
+
+
+class FrameStats:
+    def __init__(self, capacity=CAPACITY):
+        self._samples = deque(maxlen=capacity)
+        self._seq = 0
+        self.overlay_visible = False
+
+    def mark(self):
+        """Отметка начала участка (сессии) для summary(since=...)"""
+        return self._seq
+
+    def record(self, screen, render_ms=None, flip_ms=None, latency_ms=None, drift_ms=None):
+        missed = 0
+        if render_ms is not None and flip_ms is not None:
+            missed = int((render_ms + flip_ms) // FRAME_BUDGET_MS)
+        self._samples.append((self._seq, screen, missed, render_ms, flip_ms, latency_ms, drift_ms))
+        self._seq += 1
+
+    def samples(self, since=0, screen=None):
+        return [s for s in self._samples if s[0] >= since and (screen is None or s[1] == screen)]
+
+    def summary(self, since=0, screens=None):
+        """{экран: {'frames', 'missed', поле: [p50, p95, p99]}} по записям начиная с since"""
+        grouped = {}
+        for sample in self.samples(since):
+            if screens is None or sample[1] in screens:
+                grouped.setdefault(sample[1], []).append(sample)
+        result = {}
+        for screen, rows in grouped.items():
+            entry = {'frames': sum(1 for r in rows if r[4] is not None),
+                     'missed': sum(r[2] for r in rows)}
+            for column, field in enumerate(_FIELDS, start=3):
+                values = [r[column] for r in rows if r[column] is not None]
+                if values:
+                    entry[field] = [round(float(v), 3) for v in np.percentile(values, PERCENTILES)]
+            result[screen] = entry
+        return result
+
+    def summary_json(self, since=0, screens=None):
+        return json.dumps(self.summary(since, screens), ensure_ascii=False, separators=(',', ':'))
+
+    # ---------- оверлей ----------
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+
+    def draw_overlay(self, surface, screen):
+        """Рисует сводку по экрану в левом верхнем углу; возвращает занятую область"""
+        stats = self.summary(since=max(0, self._seq - 240), screens=(screen,)).get(screen)
+        font = get_font(22)
+        lines = [f"{screen}  кадров: {stats['frames'] if stats else 0}  "
+                 f"пропущено: {stats['missed'] if stats else 0}"]
+        for field in _FIELDS:
+            if stats and field in stats:
+                p50, p95, p99 = stats[field]
+                lines.append(f"{field:<10} p50 {p50:6.2f}  p95 {p95:6.2f}  p99 {p99:6.2f}")
+        rect = pygame.Rect(8, 8, 440, 8 + 20 * len(lines))
+        surface.fill((0, 0, 0), rect)
+        for i, line in enumerate(lines):
+            # цифры меняются каждый кадр — мимо кэша текста, чтобы его не засорять
+            surface.blit(font.render(line, True, (0, 255, 0)), (14, 12 + 20 * i))
+        return rect
+
+
+frame_stats = FrameStats()
@@ -0,0 +1,101 @@
+from db import get_connection
+
+# ====================== ЛИДЕРБОРД ======================
+# Все запросы идут по сводной таблице user_stats (см. user_stats.py).
+# Строка результата: (rank, user_id, username, avg_rt, avg_errors, avg_accuracy, streak)
+# При равных значениях место определяет user_id — порядок всегда однозначный.
+# Учитываются только строки, у которых есть пользователь в users: сессии
+# удалённого пользователя остаются в базе и не должны занимать места.
+
+PAGE_SIZE = 5
+
+# ключ сортировки -> (столбец user_stats, направление, подпись для экрана)
+SORT_KEYS = {
+    'rt': ('avg_rt', 'ASC', "по скорости реакции"),
+    'accuracy': ('avg_accuracy', 'DESC', "по точности"),
+    'errors': ('avg_errors', 'ASC', "по числу ошибок"),
+}
+
+
+def _sort_clause(sort):
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Неизвестный ключ сортировки: {sort}")
+    column, direction, _ = SORT_KEYS[sort]
+    return column, direction
+
+
+def get_leaderboard_page(sort='rt', limit=PAGE_SIZE, offset=0, conn=None):
+    """Одна страница лидерборда вместе с местами и стриками — одним запросом.
+
+    Внутренний подзапрос берёт первые offset + limit строк (уже соединённых
+    с users) по индексу сортируемого столбца, ROW_NUMBER() нумерует их,
+    внешний отрезает страницу.
+    """
+    conn = conn or get_connection()
+    column, direction = _sort_clause(sort)
+    try:
+        return conn.execute(f'''
+            SELECT rank, user_id, username, avg_rt, avg_errors, avg_accuracy, streak
+            FROM (
+                SELECT
+                    ROW_NUMBER() OVER (ORDER BY st.{column} {direction}, st.user_id {direction}) AS rank,
+                    st.user_id,
+                    st.username,
+                    st.avg_rt,
+                    st.avg_errors,
+                    st.avg_accuracy,
+                    st.streak
+                FROM (
+                    SELECT s.user_id, u.username, s.avg_rt, s.avg_errors, s.avg_accuracy,
+                           COALESCE(u.streak, 0) AS streak, s.{column}
+                    FROM user_stats s
+                    JOIN users u ON u.id = s.user_id
+                    WHERE s.session_count >= 1
+                    ORDER BY s.{column} {direction}, s.user_id {direction}
+                    LIMIT :end
+                ) st
+            )
+            WHERE rank > :offset
+            ORDER BY rank
+        ''', {'end': offset + limit, 'offset': offset}).fetchall()
+    except Exception as e:
+        print("Ошибка при получении лидерборда:", e)
+        return []
+
+
+def get_user_rank(user_id, sort='rt', conn=None):
+    """Место пользователя в лидерборде (даже вне первой страницы) или None"""
+    conn = conn or get_connection()
+    column, direction = _sort_clause(sort)
+    better = '<' if direction == 'ASC' else '>'
+    try:
+        return conn.execute(f'''
+            SELECT
+                (SELECT COUNT(*) FROM user_stats o JOIN users ou ON ou.id = o.user_id
+                 WHERE o.{column} {better} st.{column} AND o.session_count >= 1)
+                + (SELECT COUNT(*) FROM user_stats o JOIN users ou ON ou.id = o.user_id
+                   WHERE o.{column} = st.{column} AND o.user_id {better} st.user_id
+                     AND o.session_count >= 1)
+                + 1 AS rank,
+                st.user_id,
+                u.username,
+                st.avg_rt,
+                st.avg_errors,
+                st.avg_accuracy,
+                COALESCE(u.streak, 0) AS streak
+            FROM user_stats st
+            JOIN users u ON u.id = st.user_id
+            WHERE st.user_id = ? AND st.session_count >= 1
+        ''', (user_id,)).fetchone()
+    except Exception as e:
+        print("Ошибка при получении места в лидерборде:", e)
+        return None
+
+
+def count_ranked_users(conn=None):
+    conn = conn or get_connection()
+    return conn.execute('''
+        SELECT COUNT(*) FROM user_stats s
+        JOIN users u ON u.id = s.user_id
+        WHERE s.session_count >= 1
+    ''').fetchone()[0]
@@ -0,0 +1,229 @@
+from db import get_connection
+
+# ====================== МИГРАЦИИ СХЕМЫ ======================
+# Версия схемы хранится в PRAGMA user_version.
+# Каждая миграция выполняется один раз, в своей транзакции, вместе с
+# повышением user_version. Новые изменения схемы — только новой функцией
+# с @migration(<следующий номер>), уже выпущенные миграции не редактируем.
+# Версия перечитывается внутри транзакции: если базу делят несколько станций,
+# миграцию применяет только первая.
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def get_schema_version(conn=None):
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn=None, target=None):
+    """Применяет все миграции новее текущей версии. Возвращает итоговую версию"""
+    conn = conn or get_connection()
+    version = get_schema_version(conn)
+    for number, description, func in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        cur = conn.cursor()
+        try:
+            # IMMEDIATE сразу берёт блокировку записи: вторая станция с той же
+            # базой ждёт здесь, а после нас увидит уже повышенную версию
+            cur.execute("BEGIN IMMEDIATE")
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            if number <= version:
+                conn.rollback()
+                continue
+            func(cur)
+            cur.execute(f"PRAGMA user_version = {int(number)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"❌ Ошибка миграции {number}: {description}")
+            raise
+        finally:
+            cur.close()
+        version = number
+        print(f"Миграция {number}: {description}")
+    return version
+
+
+def _columns(cur, table):
+    cur.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cur.fetchall()]
+
+
+# ====================== СПИСОК МИГРАЦИЙ ======================
+
+@migration(1, "базовые таблицы users и sessions")
+def _base_schema(cur):
+    cur.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        last_training_date TEXT DEFAULT NULL,
+        streak INTEGER DEFAULT 0
+    )''')
+
+    cur.execute('''CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        avg_rt REAL,
+        misses INTEGER DEFAULT 0,
+        false_alarms INTEGER DEFAULT 0,
+        variability REAL,
+        accuracy REAL,
+        correct_rts TEXT,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+
+    # Старые базы, созданные до появления стриков
+    columns = _columns(cur, 'users')
+    if 'last_training_date' not in columns:
+        cur.execute("ALTER TABLE users ADD COLUMN last_training_date TEXT DEFAULT NULL")
+    if 'streak' not in columns:
+        cur.execute("ALTER TABLE users ADD COLUMN streak INTEGER DEFAULT 0")
+
+
+@migration(2, "покрывающий индекс sessions(user_id, date, метрики)")
+def _sessions_user_date_index(cur):
+    # История пользователя (WHERE user_id = ? ORDER BY date DESC) и агрегаты
+    # лидерборда (GROUP BY user_id) читаются целиком из индекса, без таблицы и сортировки
+    cur.execute('''CREATE INDEX IF NOT EXISTS idx_sessions_user_date
+        ON sessions(user_id, date, avg_rt, misses, false_alarms, variability, accuracy)''')
+    cur.execute("ANALYZE sessions")
+
+
+@migration(3, "сводная таблица user_stats для лидерборда")
+def _user_stats(cur):
+    cur.execute('''CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        session_count INTEGER NOT NULL DEFAULT 0,
+        sum_rt REAL NOT NULL DEFAULT 0,
+        sum_errors REAL NOT NULL DEFAULT 0,
+        sum_accuracy REAL NOT NULL DEFAULT 0,
+        avg_rt REAL,
+        avg_errors REAL,
+        avg_accuracy REAL,
+        best_rt REAL,
+        best_accuracy REAL,
+        last_session_id INTEGER,
+        last_session_date TEXT,
+        last_rt REAL,
+        last_accuracy REAL,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_stats_avg_rt ON user_stats(avg_rt)")
+    # начальное заполнение — SQL зафиксирован здесь как выпущен
+    # (user_stats.REBUILD_SQL для editor.py с тех пор менялся)
+    cur.execute("DELETE FROM user_stats")
+    cur.execute('''
+        INSERT INTO user_stats (
+            user_id, session_count, sum_rt, sum_errors, sum_accuracy,
+            avg_rt, avg_errors, avg_accuracy, best_rt, best_accuracy,
+            last_session_id, last_session_date, last_rt, last_accuracy)
+        SELECT agg.user_id, agg.n, agg.sum_rt, agg.sum_errors, agg.sum_accuracy,
+               agg.sum_rt / agg.n, agg.sum_errors / agg.n, agg.sum_accuracy / agg.n,
+               agg.best_rt, agg.best_accuracy,
+               last.id, last.date, last.avg_rt, last.accuracy
+        FROM (
+            SELECT user_id,
+                   COUNT(*) AS n,
+                   TOTAL(avg_rt) AS sum_rt,
+                   TOTAL(misses + false_alarms) AS sum_errors,
+                   TOTAL(accuracy) AS sum_accuracy,
+                   MIN(CASE WHEN avg_rt > 0 THEN avg_rt END) AS best_rt,
+                   MAX(accuracy) AS best_accuracy,
+                   MAX(id) AS last_id
+            FROM sessions
+            GROUP BY user_id
+        ) agg
+        JOIN sessions last ON last.id = agg.last_id
+    ''')
+
+
+@migration(4, "индексы user_stats для сортировки лидерборда по точности и ошибкам")
+def _user_stats_sort_indexes(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_stats_avg_accuracy ON user_stats(avg_accuracy)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_stats_avg_errors ON user_stats(avg_errors)")
+
+
+@migration(5, "таблица trials с результатами отдельных проб")
+def _trials(cur):
+    cur.execute('''CREATE TABLE IF NOT EXISTS trials (
+        session_id INTEGER NOT NULL,
+        trial_index INTEGER NOT NULL,
+        is_go INTEGER NOT NULL,
+        iti_ms INTEGER,
+        onset_ms INTEGER,
+        rt REAL,
+        outcome TEXT NOT NULL,
+        PRIMARY KEY (session_id, trial_index),
+        FOREIGN KEY(session_id) REFERENCES sessions(id)
+    ) WITHOUT ROWID''')
+
+
+@migration(6, "оценки погрешности тайминга в trials")
+def _trial_timing_errors(cur):
+    # onset_error_ms — сколько шёл flip, показавший стимул;
+    # input_error_ms — окно опроса, в которое попал ответ (NULL, если ответа не было)
+    columns = _columns(cur, "trials")
+    for column in ("onset_error_ms", "input_error_ms"):
+        if column not in columns:
+            cur.execute(f"ALTER TABLE trials ADD COLUMN {column} REAL")
+
+
+@migration(7, "зерно и параметры расписания проб в sessions")
+def _session_schedule(cur):
+    columns = _columns(cur, "sessions")
+    if "schedule_seed" not in columns:
+        cur.execute("ALTER TABLE sessions ADD COLUMN schedule_seed INTEGER")
+    if "schedule_params" not in columns:
+        cur.execute("ALTER TABLE sessions ADD COLUMN schedule_params TEXT")
+
+
+@migration(8, "число преждевременных нажатий в trials")
+def _trial_anticipations(cur):
+    if "anticipations" not in _columns(cur, "trials"):
+        cur.execute("ALTER TABLE trials ADD COLUMN anticipations INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(9, "сводка замеров кадров и задержек в sessions")
+def _session_frame_stats(cur):
+    # JSON: {фаза: {'frames', 'missed', 'render_ms': [p50, p95, p99], ...}}, см. instrumentation.py
+    if "frame_stats" not in _columns(cur, "sessions"):
+        cur.execute("ALTER TABLE sessions ADD COLUMN frame_stats TEXT")
+
+
+@migration(10, "trials.onset_ms как REAL")
+def _trial_onset_real(cur):
+    # onset пишется с точностью 0,1 мс (691.2), а в INTEGER-столбце SQLite
+    # хранил часть значений целыми, часть дробными. Тип столбца в SQLite
+    # не меняется — таблица пересоздаётся с тем же набором столбцов.
+    cur.execute('''CREATE TABLE trials_new (
+        session_id INTEGER NOT NULL,
+        trial_index INTEGER NOT NULL,
+        is_go INTEGER NOT NULL,
+        iti_ms INTEGER,
+        onset_ms REAL,
+        rt REAL,
+        outcome TEXT NOT NULL,
+        onset_error_ms REAL,
+        input_error_ms REAL,
+        anticipations INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, trial_index),
+        FOREIGN KEY(session_id) REFERENCES sessions(id)
+    ) WITHOUT ROWID''')
+    cur.execute('''INSERT INTO trials_new
+        SELECT session_id, trial_index, is_go, iti_ms, CAST(onset_ms AS REAL), rt, outcome,
+               onset_error_ms, input_error_ms, anticipations
+        FROM trials''')
+    cur.execute("DROP TABLE trials")
+    cur.execute("ALTER TABLE trials_new RENAME TO trials")
@@ -0,0 +1,312 @@
+import math
+
+import numpy as np
+import pygame
+
+from fonts import get_font
+from text_cache import render_text
+
+# ====================== ГРАФИКИ СРЕДСТВАМИ PYGAME ======================
+# Интерактивные экраны (прогресс, сравнение) рисуют графики сами, без
+# matplotlib: оси, сетка, линии и маркеры — pygame.draw, подписи — кэш текста.
+# Длинная история не рисуется точка в точку: видимый участок прореживается
+# LTTB (largest-triangle-three-buckets) до точки на 2 пикселя ширины —
+# пики и провалы при этом остаются. Шаг делений подбирается под ширину
+# (1, 2, 5 × 10^k), и подписи не слипаются при любой длине истории.
+# Видимый диапазон по X — XView, общий для графиков одного экрана;
+# переход к новому диапазону анимируется (step), прокрутка и масштаб плавные.
+
+BACKGROUND = (20, 20, 40)
+GRID = (52, 52, 71)          # серая сетка alpha 0.3 поверх фона
+FRAME = (90, 90, 110)
+TEXT = (255, 255, 255)
+MY_COLOR = '#00FF9F'
+OTHER_COLOR = '#FF6B6B'
+ACC_COLOR = '#4DA6FF'
+
+PX_PER_POINT = 2             # LTTB: не больше точки на 2 пикселя ширины
+MARKER_SPACING = 12          # маркеры рисуются, только если точки не ближе 12 px
+X_TICK_SPACING = 70          # минимальное расстояние между делениями, px
+Y_TICK_SPACING = 50
+EASE_MS = 80                 # постоянная времени плавного перехода XView
+MIN_SPAN = 4                 # сильнее не приближаем: 4 тренировки на ширину
+
+
+def lttb(x, y, threshold):
+    """Индексы точек, которые оставляет LTTB (первая и последняя — всегда)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # опорная точка — среднее следующей корзины (для последней — последняя точка)
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def nice_ticks(lo, hi, max_ticks, integer=False):
+    """Деления в [lo, hi] с шагом 1, 2 или 5 × 10^k, не больше max_ticks штук"""
+    span = hi - lo
+    if span <= 0:
+        return [lo], 1
+    raw = span / max(1, max_ticks)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    if integer:
+        step = max(1, round(step))
+    first = math.ceil(lo / step) * step
+    count = int((hi - first) / step + 1e-9) + 1
+    return [first + i * step for i in range(count)], step
+
+
+def _tick_label(value, step):
+    digits = max(0, -math.floor(math.log10(step))) if step < 1 else 0
+    return f"{value:.{digits}f}"
+
+
+class XView:
+    """Видимый диапазон по X. zoom/pan меняют цель, step плавно подводит к ней"""
+
+    def __init__(self, lo, hi, min_span=MIN_SPAN):
+        pad = max(0.5, (hi - lo) * 0.04)   # поля по краям, как в matplotlib
+        self.full = (lo - pad, hi + pad)
+        self.lo, self.hi = self.full
+        self.target = self.full
+        self.min_span = min(min_span, self.full[1] - self.full[0])
+        self.version = 0                   # меняется при каждом сдвиге видимого диапазона
+
+    @property
+    def span(self):
+        return self.hi - self.lo
+
+    @property
+    def animating(self):
+        return (self.lo, self.hi) != self.target
+
+    @property
+    def is_full(self):
+        return (self.lo, self.hi) == self.full and not self.animating
+
+    def _clamp(self, lo, hi):
+        full_lo, full_hi = self.full
+        span = min(max(hi - lo, self.min_span), full_hi - full_lo)
+        lo = min(max(lo, full_lo), full_hi - span)
+        return lo, lo + span
+
+    def zoom(self, factor, anchor=None):
+        """factor < 1 — приблизить; anchor (значение X) остаётся на месте"""
+        lo, hi = self.target
+        if anchor is None:
+            anchor = (lo + hi) / 2
+        self.target = self._clamp(anchor - (anchor - lo) * factor, anchor + (hi - anchor) * factor)
+
+    def pan(self, dx, immediate=False):
+        """Сдвиг на dx по X; immediate — без анимации (перетаскивание мышью)"""
+        lo, hi = self.target
+        self.target = self._clamp(lo + dx, hi + dx)
+        if immediate:
+            self.lo, self.hi = self.target
+            self.version += 1
+
+    def reset(self):
+        self.target = self.full
+
+    def step(self, dt_ms):
+        """Шаг анимации к цели; True, если диапазон изменился"""
+        if not self.animating:
+            return False
+        k = 1 - math.exp(-max(dt_ms, 0) / EASE_MS)
+        lo, hi = self.target
+        self.lo += (lo - self.lo) * k
+        self.hi += (hi - self.hi) * k
+        if abs(self.lo - lo) + abs(self.hi - hi) < (hi - lo) * 1e-3:
+            self.lo, self.hi = lo, hi
+        self.version += 1
+        return True
+
+
+class Series:
+    def __init__(self, x, y, color, label=None, marker='o', width=3, marker_size=5):
+        """x — по возрастанию; marker 'o' (круг), 's' (квадрат) или None"""
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.color = pygame.Color(color)
+        self.label = label
+        self.marker = marker
+        self.width = width
+        self.marker_size = marker_size
+
+    def visible(self, lo, hi):
+        """Срез точек в [lo, hi] плюс по соседу с краёв — линия уходит за рамку"""
+        start = max(int(np.searchsorted(self.x, lo, 'left')) - 1, 0)
+        end = min(int(np.searchsorted(self.x, hi, 'right')) + 1, len(self.x))
+        return slice(start, end)
+
+
+class Plot:
+    """График с осями в своей поверхности size; перерисовывается при смене XView"""
+
+    def __init__(self, size, view, series, title, xlabel=None, ylabel=None, dashed_grid=False):
+        self.size = tuple(size)
+        self.view = view
+        self.series = list(series)
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.dashed_grid = dashed_grid
+
+        self.title_font = get_font(30)
+        self.label_font = get_font(24)
+        self.tick_font = get_font(20)
+
+        top = 40
+        bottom = 56 if xlabel else 32
+        left = 78 if ylabel else 54
+        self.axes = pygame.Rect(left, top, self.size[0] - left - 16, self.size[1] - top - bottom)
+        self._ylabel = pygame.transform.rotate(render_text(self.label_font, ylabel, TEXT), 90) if ylabel else None
+        self._dashes = None
+        if dashed_grid:
+            self._dashes = (self._dash_strip(self.axes.width, False), self._dash_strip(self.axes.height, True))
+        self._layer = None
+        self._version = None
+
+    # ---------- координаты ----------
+
+    def x_at(self, px):
+        """Значение X под пикселем px (в координатах поверхности графика)"""
+        view = self.view
+        return view.lo + (px - self.axes.x) / self.axes.width * view.span
+
+    def pixels_to_x(self, dx):
+        return dx / self.axes.width * self.view.span
+
+    # ---------- отрисовка ----------
+
+    def surface(self):
+        """Готовая поверхность для текущего диапазона (новая после каждого изменения)"""
+        if self._layer is None or self._version != self.view.version:
+            self._layer = self.render()
+            self._version = self.view.version
+        return self._layer
+
+    def render(self):
+        layer = pygame.Surface(self.size)
+        layer.fill(BACKGROUND)
+        ax = self.axes
+        lo, hi = self.view.lo, self.view.hi
+
+        visible = [(s, s.visible(lo, hi)) for s in self.series]
+        ymin, ymax = self._y_range(lo, hi)
+
+        def to_px(x, y):
+            px = ax.x + (x - lo) / (hi - lo) * ax.width
+            py = ax.bottom - (y - ymin) / (ymax - ymin) * ax.height
+            return np.column_stack((px, py))
+
+        # сетка и подписи делений
+        yticks, ystep = nice_ticks(ymin, ymax, ax.height // Y_TICK_SPACING)
+        for value in yticks:
+            y = round(ax.bottom - (value - ymin) / (ymax - ymin) * ax.height)
+            self._grid_line(layer, (ax.x, y), (ax.right, y))
+            label = render_text(self.tick_font, _tick_label(value, ystep), TEXT)
+            layer.blit(label, label.get_rect(midright=(ax.x - 6, y)))
+        xticks, xstep = nice_ticks(math.ceil(lo), math.floor(hi), ax.width // X_TICK_SPACING, integer=True)
+        for value in xticks:
+            x = round(ax.x + (value - lo) / (hi - lo) * ax.width)
+            self._grid_line(layer, (x, ax.y), (x, ax.bottom))
+            label = render_text(self.tick_font, _tick_label(value, xstep), TEXT)
+            layer.blit(label, label.get_rect(midtop=(x, ax.bottom + 4)))
+        pygame.draw.rect(layer, FRAME, ax, 1)
+
+        # линии и маркеры — только внутри осей
+        layer.set_clip(ax)
+        for s, part in visible:
+            x, y = s.x[part], s.y[part]
+            if len(x) == 0:
+                continue
+            # расстояние между соседними точками на экране — до прореживания
+            spacing = ax.width / (hi - lo) * (s.x[-1] - s.x[0]) / max(len(s.x) - 1, 1)
+            if len(x) > ax.width // PX_PER_POINT:
+                kept = lttb(x, y, ax.width // PX_PER_POINT)
+                x, y = x[kept], y[kept]
+            points = to_px(x, y)
+            if len(points) > 1:
+                pygame.draw.lines(layer, s.color, False, points, s.width)
+            if s.marker and spacing >= MARKER_SPACING:
+                for px, py in points:
+                    self._marker(layer, s, px, py)
+        layer.set_clip(None)
+
+        # заголовок, подписи осей, легенда
+        title = render_text(self.title_font, self.title, TEXT)
+        layer.blit(title, title.get_rect(midtop=(ax.centerx, 6)))
+        if self.xlabel:
+            label = render_text(self.label_font, self.xlabel, TEXT)
+            layer.blit(label, label.get_rect(midbottom=(ax.centerx, self.size[1] - 4)))
+        if self._ylabel:
+            layer.blit(self._ylabel, self._ylabel.get_rect(midleft=(4, ax.centery)))
+        self._legend(layer)
+        return layer
+
+    def _y_range(self, lo, hi):
+        """Пределы Y по видимым точкам с полями 5%"""
+        values = [s.y[(s.x >= lo) & (s.x <= hi)] for s in self.series]
+        values = [v for v in values if len(v)] or [s.y for s in self.series if len(s.y)]
+        if not values:
+            return 0.0, 1.0
+        ymin = min(float(v.min()) for v in values)
+        ymax = max(float(v.max()) for v in values)
+        if ymax - ymin < 1e-9:
+            return ymin - 1, ymax + 1
+        pad = (ymax - ymin) * 0.05
+        return ymin - pad, ymax + pad
+
+    def _grid_line(self, layer, start, end):
+        """Линия сетки: горизонтальная или вертикальная"""
+        if self._dashes is None:
+            pygame.draw.line(layer, GRID, start, end)
+        else:
+            layer.blit(self._dashes[start[0] == end[0]], start)
+
+    @staticmethod
+    def _dash_strip(length, vertical):
+        # пунктир готовится один раз: 6 px штрих, 4 px пропуск; фон прозрачен (colorkey)
+        strip = pygame.Surface((1, length) if vertical else (length, 1))
+        strip.fill(BACKGROUND)
+        strip.set_colorkey(BACKGROUND)
+        for d in range(0, length, 10):
+            dash = pygame.Rect(0, d, 1, 6) if vertical else pygame.Rect(d, 0, 6, 1)
+            strip.fill(GRID, dash)
+        return strip
+
+    def _marker(self, layer, s, x, y):
+        if s.marker == 's':
+            rect = pygame.Rect(0, 0, s.marker_size * 2, s.marker_size * 2)
+            rect.center = (round(x), round(y))
+            pygame.draw.rect(layer, s.color, rect)
+        else:
+            pygame.draw.circle(layer, s.color, (round(x), round(y)), s.marker_size)
+
+    def _legend(self, layer):
+        labelled = [s for s in self.series if s.label]
+        if not labelled:
+            return
+        rows = [render_text(self.tick_font, s.label, (0, 0, 0)) for s in labelled]
+        box = pygame.Rect(self.axes.x + 8, self.axes.y + 8, 44 + max(r.get_width() for r in rows),
+                          8 + 22 * len(rows))
+        pygame.draw.rect(layer, (235, 235, 235), box, border_radius=4)
+        for i, (s, row) in enumerate(zip(labelled, rows)):
+            y = box.y + 15 + 22 * i
+            pygame.draw.line(layer, s.color, (box.x + 6, y), (box.x + 30, y), s.width)
+            self._marker(layer, s, box.x + 18, y)
+            layer.blit(row, row.get_rect(midleft=(box.x + 38, y)))
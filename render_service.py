@@ -0,0 +1,79 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# ====================== ФОНОВАЯ СБОРКА ОТЧЁТОВ ======================
+# matplotlib и reportlab работают сотни миллисекунд и больше, а окно pygame
+# в это время не обрабатывает события («не отвечает»). Поэтому PDF-отчёты
+# с графиками строятся в отдельных процессах (matplotlib не потокобезопасен),
+# а экран получает RenderJob и, пока он не готов, показывает индикатор.
+# Задачи помечаются экраном-владельцем: уходя с экрана, он вызывает
+# cancel(owner) — ещё не начатые задачи снимаются, результат начатых
+# просто никто не заберёт.
+# Процессы запускаются через spawn (как на Windows) — без копии состояния
+# pygame и соединений SQLite родителя. Пул создаётся при первом отчёте:
+# при обычном запуске игры лишний процесс с matplotlib не нужен.
+# В сборке PyInstaller game.py вызывает multiprocessing.freeze_support().
+
+MAX_WORKERS = 1   # отчёты строятся по одному; лишний процесс с matplotlib — лишняя память
+
+
+# ---------- задачи (выполняются в процессе-воркере) ----------
+
+def _report_job(data, filename):
+    from testpdf import ReactionReportGenerator
+    ReactionReportGenerator(filename).generate_report(data)
+    return filename
+
+
+class RenderJob:
+    """Результат фоновой задачи"""
+
+    def __init__(self, future):
+        self._future = future
+
+    def done(self):
+        return self._future.done()
+
+    def cancel(self):
+        return self._future.cancel()
+
+    def result(self):
+        """Готовый результат (поднимает исключение задачи). Вызывать после done()"""
+        return self._future.result()
+
+
+class RenderService:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._owned = {}   # экран → задачи, которые он ещё может отменить
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _submit(self, owner, fn, *args):
+        future = self._executor().submit(fn, *args)
+        jobs = self._owned.setdefault(owner, set())
+        jobs.add(future)
+        future.add_done_callback(jobs.discard)
+        return RenderJob(future)
+
+    def report(self, owner, data, filename="reaction_report.pdf"):
+        """PDF-отчёт ReactionReportGenerator; результат — имя файла"""
+        return self._submit(owner, _report_job, data, filename)
+
+    def cancel(self, owner):
+        """Снимает ещё не начатые задачи экрана owner"""
+        for future in list(self._owned.pop(owner, ())):
+            future.cancel()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+render_service = RenderService()
@@ -0,0 +1,78 @@
+import json
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для as_numpy
+    np = None
+
+# ====================== УПАКОВКА ВРЕМЁН РЕАКЦИИ ======================
+# sessions.correct_rts хранится как BLOB:
+#   b'RT' | версия (1 байт) | тип (1 байт: b'H' = uint16, b'f' = float32) | данные little-endian
+# Целые миллисекунды (до 65535) пакуются в uint16, дробные — во float32.
+# Старые строки с JSON-текстом ('[312, 298, ...]') читаются так же прозрачно.
+
+MAGIC = b'RT'
+VERSION = 1
+HEADER_SIZE = 4
+
+_NUMPY_DTYPES = {'H': '<u2', 'f': '<f4'}
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def encode_rts(values):
+    """Список времён реакции -> компактный BLOB"""
+    values = list(values or [])
+    if all(float(v).is_integer() and 0 <= v <= 0xFFFF for v in values):
+        code = 'H'
+        data = array('H', (int(v) for v in values))
+    else:
+        code = 'f'
+        data = array('f', (float(v) for v in values))
+    if not _LITTLE_ENDIAN:
+        data.byteswap()
+    return MAGIC + bytes((VERSION, ord(code))) + data.tobytes()
+
+
+def is_packed(value):
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:2]) == MAGIC
+
+
+def _header(blob):
+    version, code = blob[2], chr(blob[3])
+    if version != VERSION or code not in _NUMPY_DTYPES:
+        raise ValueError(f"Неизвестный формат correct_rts: версия {version}, тип {code!r}")
+    return code
+
+
+def rts_view(blob):
+    """memoryview на данные BLOB без копирования (на little-endian машинах)"""
+    code = _header(blob)
+    view = memoryview(blob)[HEADER_SIZE:]
+    if _LITTLE_ENDIAN:
+        return view.cast(code)
+    data = array(code, view)
+    data.byteswap()
+    return memoryview(data)
+
+
+def as_numpy(value):
+    """Времена реакции как массив NumPy; для BLOB — без копирования"""
+    if np is None:
+        raise ImportError("Для as_numpy нужен numpy")
+    if is_packed(value):
+        code = _header(value)
+        return np.frombuffer(value, dtype=_NUMPY_DTYPES[code], offset=HEADER_SIZE)
+    return np.asarray(decode_rts(value), dtype=float)
+
+
+def decode_rts(value):
+    """Значение столбца correct_rts (BLOB, JSON-текст или NULL) -> список чисел"""
+    if value is None or value == '' or value == b'':
+        return []
+    if is_packed(value):
+        return rts_view(value).tolist()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).decode('utf-8')
+    return json.loads(value)
@@ -0,0 +1,101 @@
+import json
+import secrets
+
+import numpy as np
+
+# ====================== РАСПИСАНИЕ ПРОБ ======================
+# Весь план тренировки (какая проба Go/No-Go и какая перед ней пауза)
+# строится заранее из зерна генератора — в цикле проб случайных чисел нет.
+# Доля Go точная (а не «примерно 70%»), длина серий одинаковых проб
+# ограничена, паузы берутся из заданного распределения.
+# Зерно и параметры хранятся с сессией: build_schedule(**params, seed=seed)
+# восстанавливает ту же последовательность.
+
+NUM_TRIALS = 60
+GO_RATIO = 0.70
+MAX_RUN = 8                      # не больше 8 одинаковых проб подряд
+ITI = ('uniform', 600, 1100)     # (распределение, минимум мс, максимум мс)
+
+BATCH = 256                      # сколько перестановок проверяем за один проход
+MAX_BATCHES = 64
+
+
+class Schedule:
+    def __init__(self, seed, params, is_go, iti_ms):
+        self.seed = seed
+        self.params = params
+        self.is_go = is_go        # список bool
+        self.iti_ms = iti_ms      # список int
+
+    def __len__(self):
+        return len(self.is_go)
+
+    def __iter__(self):
+        """(is_go, iti_ms) по порядку проб"""
+        return zip(self.is_go, self.iti_ms)
+
+    def params_json(self):
+        return json.dumps(self.params, separators=(',', ':'))
+
+
+def new_seed():
+    # 63 бита — влезает в INTEGER SQLite
+    return secrets.randbits(63)
+
+
+def _longest_runs(rows):
+    """Длина самой длинной серии одинаковых значений в каждой строке матрицы"""
+    n = rows.shape[1]
+    idx = np.arange(n)
+    starts = np.ones_like(rows, dtype=bool)
+    starts[:, 1:] = rows[:, 1:] != rows[:, :-1]
+    last_start = np.maximum.accumulate(np.where(starts, idx, 0), axis=1)
+    return (idx - last_start + 1).max(axis=1)
+
+
+def _draw_sequence(rng, num_trials, n_go, max_run):
+    base = np.zeros(num_trials, dtype=bool)
+    base[:n_go] = True
+    if max_run is None or max_run >= num_trials:
+        return rng.permutation(base)
+    for _ in range(MAX_BATCHES):
+        rows = rng.permuted(np.tile(base, (BATCH, 1)), axis=1)
+        ok = np.flatnonzero(_longest_runs(rows) <= max_run)
+        if ok.size:
+            return rows[ok[0]]
+    raise ValueError(f"Не удалось построить расписание с сериями не длиннее {max_run}")
+
+
+def _draw_iti(rng, num_trials, iti):
+    kind, low, high = iti
+    if kind == 'fixed':
+        return np.full(num_trials, low, dtype=np.int64)
+    if kind == 'uniform':
+        return rng.integers(low, high, endpoint=True, size=num_trials)
+    if kind == 'exponential':
+        # «без старения»: вероятность стимула не растёт с ожиданием; хвост обрезаем по high
+        values = low + rng.exponential((high - low) / 3, size=num_trials)
+        return np.minimum(np.rint(values), high).astype(np.int64)
+    raise ValueError(f"Неизвестное распределение пауз: {kind!r}")
+
+
+def build_schedule(seed=None, num_trials=NUM_TRIALS, go_ratio=GO_RATIO, max_run=MAX_RUN, iti=ITI):
+    """План тренировки. seed=None — новое случайное зерно (сохраняется в Schedule.seed)"""
+    if seed is None:
+        seed = new_seed()
+    n_go = int(round(num_trials * go_ratio))
+    n_nogo = num_trials - n_go
+    if max_run is not None and max(n_go, n_nogo) > (min(n_go, n_nogo) + 1) * max_run:
+        raise ValueError(f"При {n_go} Go и {n_nogo} No-Go серии не уложить в {max_run}")
+
+    rng = np.random.default_rng(seed)
+    is_go = _draw_sequence(rng, num_trials, n_go, max_run)
+    iti_ms = _draw_iti(rng, num_trials, tuple(iti))
+
+    params = {'num_trials': num_trials, 'go_ratio': go_ratio, 'max_run': max_run, 'iti': list(iti)}
+    return Schedule(seed, params, is_go.tolist(), iti_ms.tolist())
+
+
+def schedule_from_session(seed, params_json):
+    """Восстанавливает расписание сохранённой сессии"""
+    return build_schedule(seed=seed, **json.loads(params_json))
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from rt_codec import encode_rts
+from user_stats import record_session
+
+# ====================== ЗАПИСЬ СЕССИИ ======================
+# Без зависимостей от интерфейса: используется и игрой (game.py),
+# и безголовым прогоном (headless.py).
+
+
+def trial_outcome(is_go, responded):
+    if is_go:
+        return 'hit' if responded else 'miss'
+    return 'false_alarm' if responded else 'correct_rejection'
+
+
+def write_session(cur, user_id, metrics, trials=None, date=None):
+    """Записывает сессию, её пробы и сводку user_stats курсором cur (без commit).
+
+    date — 'YYYY-MM-DD HH:MM:SS', по умолчанию текущее время. Возвращает id сессии.
+    """
+    date_str = date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    correct_rts_blob = encode_rts(metrics.get('correct_rts', []))
+
+    cur.execute('''INSERT INTO sessions 
+        (user_id, date, avg_rt, misses, false_alarms, variability, accuracy, correct_rts,
+         schedule_seed, schedule_params, frame_stats)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (user_id, date_str, metrics['avg_rt'], metrics['misses'],
+                 metrics['false_alarms'], metrics['variability'],
+                 metrics['accuracy'], correct_rts_blob,
+                 metrics.get('schedule_seed'), metrics.get('schedule_params'),
+                 metrics.get('frame_stats')))
+    session_id = cur.lastrowid
+    # пробы и сводка для лидерборда — в той же транзакции
+    if trials:
+        cur.executemany('''INSERT INTO trials
+            (session_id, trial_index, is_go, iti_ms, onset_ms, rt, outcome, onset_error_ms, input_error_ms,
+             anticipations)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                        [(session_id, i, int(t['is_go']), t.get('iti'), t.get('onset'), t['rt'],
+                          trial_outcome(t['is_go'], t['rt'] is not None),
+                          t.get('onset_error'), t.get('input_error'), t.get('anticipations', 0))
+                         for i, t in enumerate(trials)])
+    record_session(cur, user_id, session_id, date_str, metrics)
+    return session_id
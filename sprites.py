@@ -0,0 +1,83 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+# ====================== АНИМИРОВАННЫЕ ЭЛЕМЕНТЫ ======================
+# Кадры анимации готовятся один раз (масштаб, поворот и т.п.), а на каждом
+# кадре экрана выбирается нужный по времени и просто копируется на экран.
+# Готовые анимации хранятся в кэше по ключу (например, ('streak', 5)).
+
+DEFAULT_MAX_ENTRIES = 32
+
+
+class AnimatedSprite:
+    """Последовательность готовых кадров, каждый показывается frame_ms миллисекунд"""
+
+    def __init__(self, frames, frame_ms):
+        if not frames:
+            raise ValueError("Анимации нужен хотя бы один кадр")
+        self.frames = list(frames)
+        self.frame_ms = frame_ms
+
+    def frame_index(self, ticks):
+        return ticks // self.frame_ms % len(self.frames)
+
+    def frame(self, ticks):
+        return self.frames[self.frame_index(ticks)]
+
+    def ms_to_next_frame(self, ticks):
+        """Сколько ждать до смены кадра (для IdleScreen.events)"""
+        return self.frame_ms - ticks % self.frame_ms
+
+    def bounds(self, **anchor):
+        """Прямоугольник, покрывающий любой кадр при той же привязке (topright=..., center=...)"""
+        rect = self.frames[0].get_rect(**anchor)
+        for surf in self.frames[1:]:
+            rect.union_ip(surf.get_rect(**anchor))
+        return rect
+
+    def draw(self, screen, ticks, **anchor):
+        """Рисует текущий кадр; привязка как у Surface.get_rect. Возвращает занятую область"""
+        surf = self.frame(ticks)
+        return screen.blit(surf, surf.get_rect(**anchor))
+
+
+def pulse_frames(surface, steps=10, amplitude=0.08):
+    """Кадры «пульсации»: масштаб растёт от 1.0 до 1.0 + amplitude за steps шагов"""
+    return [pygame.transform.rotozoom(surface, 0, 1.0 + amplitude * i / steps) for i in range(steps)]
+
+
+def spinner_frames(radius, color, steps=12, width=6):
+    """Кадры индикатора загрузки: дуга в четверть круга, за steps кадров — полный оборот"""
+    size = radius * 2 + 2
+    frames = []
+    for i in range(steps):
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        start = -2 * math.pi * i / steps  # по часовой стрелке
+        pygame.draw.arc(surf, color, surf.get_rect(), start, start + math.pi / 2, width)
+        frames.append(surf)
+    return frames
+
+
+class SpriteCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+
+    def get(self, key, build):
+        """Анимация по ключу; при промахе строится вызовом build()"""
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        sprite = self._sprites[key] = build()
+        if len(self._sprites) > self.max_entries:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        self._sprites.clear()
+
+
+sprite_cache = SpriteCache()
@@ -0,0 +1,46 @@
+import pygame
+
+from text_cache import render_text
+
+# ====================== КАДРЫ СТИМУЛОВ ======================
+# Все кадры пробы (фиксация, GO, NO GO, обратная связь) рисуются один раз
+# до начала тренировки в полноэкранные поверхности формата дисплея (convert()).
+# В цикле пробы остаётся один blit — меньше работы на кадр, меньше разброс
+# момента показа стимула.
+
+BACKGROUND = (20, 20, 40)
+
+
+class StimulusAssets:
+    def __init__(self, size, font):
+        """size — размер окна, font — крупный шрифт надписей (нужен уже созданный дисплей)"""
+        self.size = tuple(size)
+
+        self.fixation = self._frame()
+
+        self.go = self._frame()
+        self.go_rect = pygame.draw.circle(self.go, (0, 255, 80), (500, 350), 110)
+        self.go.blit(render_text(font, "GO", (0, 0, 0)), (460, 325))
+
+        self.nogo = self._frame()
+        self.nogo_rect = pygame.Rect(390, 240, 220, 220)
+        pygame.draw.rect(self.nogo, (255, 50, 50), self.nogo_rect)
+        self.nogo.blit(render_text(font, "NO GO", (0, 0, 0)), (415, 325))
+
+        self.correct = self._frame()
+        self.correct.blit(render_text(font, "Правильно!", (0, 255, 100)), (350, 320))
+
+        self.incorrect = self._frame()
+        self.incorrect.blit(render_text(font, "Неправильно!", (255, 80, 80)), (330, 320))
+
+    def _frame(self):
+        surf = pygame.Surface(self.size).convert()
+        surf.fill(BACKGROUND)
+        return surf
+
+    def stimulus(self, is_go):
+        """(кадр, область клика) для стимула пробы"""
+        return (self.go, self.go_rect) if is_go else (self.nogo, self.nogo_rect)
+
+    def feedback(self, correct):
+        return self.correct if correct else self.incorrect
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from db import transaction
+
+# ====================== СТРИКИ ======================
+# streak — длина последней серии дней подряд с тренировками,
+# last_training_date — последний такой день (YYYY-MM-DD).
+
+# Одна инструкция UPDATE: чтение и запись идут под одной блокировкой,
+# гонки между станциями нет. Даты сравниваются средствами SQLite.
+UPDATE_STREAK_SQL = '''
+    UPDATE users SET
+        streak = CASE
+            WHEN last_training_date = :today THEN COALESCE(streak, 0)
+            WHEN last_training_date = date(:today, '-1 day') THEN COALESCE(streak, 0) + 1
+            ELSE 1
+        END,
+        last_training_date = :today
+    WHERE id = :user_id
+'''
+
+# gaps-and-islands: у дней одной серии разность (день - номер по порядку) одинакова
+LATEST_STREAKS_SQL = '''
+    WITH days AS (
+        SELECT DISTINCT user_id, date(date) AS day FROM sessions
+    ),
+    islands AS (
+        SELECT user_id, day,
+               julianday(day) - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS grp
+        FROM days
+    ),
+    runs AS (
+        SELECT user_id, MAX(day) AS last_day, COUNT(*) AS len
+        FROM islands
+        GROUP BY user_id, grp
+    ),
+    ranked AS (
+        SELECT user_id, last_day, len,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS rn
+        FROM runs
+    )
+    SELECT user_id, last_day, len FROM ranked WHERE rn = 1
+'''
+
+
+def update_streak(cur, user_id, today=None):
+    """Обновляет streak после тренировки. Возвращает (streak, дата) или None"""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    cur.execute(UPDATE_STREAK_SQL, {'today': today, 'user_id': user_id})
+    if cur.rowcount == 0:
+        return None
+    # та же транзакция держит блокировку записи — значение уже наше
+    cur.execute("SELECT streak, last_training_date FROM users WHERE id = ?", (user_id,))
+    return tuple(cur.fetchone())
+
+
+def recompute_streaks(cur=None):
+    """Пересчитывает streak и last_training_date всех пользователей по таблице sessions.
+
+    Возвращает число пользователей, у которых есть хотя бы одна сессия.
+    """
+    if cur is None:
+        with transaction() as cur:
+            return recompute_streaks(cur)
+
+    cur.execute("DROP TABLE IF EXISTS temp.latest_streaks")
+    cur.execute('''CREATE TEMP TABLE latest_streaks (
+        user_id INTEGER PRIMARY KEY,
+        last_day TEXT,
+        len INTEGER
+    )''')
+    cur.execute("INSERT INTO latest_streaks " + LATEST_STREAKS_SQL)
+    count = cur.rowcount
+    cur.execute('''
+        UPDATE users SET
+            streak = COALESCE((SELECT len FROM latest_streaks s WHERE s.user_id = users.id), 0),
+            last_training_date = (SELECT last_day FROM latest_streaks s WHERE s.user_id = users.id)
+    ''')
+    cur.execute("DROP TABLE temp.latest_streaks")
+    return count
@@ -1,6 +1,5 @@
 import matplotlib
 matplotlib.use('Agg')  # Важно для PyInstaller
-import matplotlib.pyplot as plt
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -14,6 +13,8 @@ import io
 import os
 import sys
 
+from charts import LineChart, get_chart
+
 class ReactionReportGenerator:
     def __init__(self, output_filename="reaction_report.pdf"):
         self.output_filename = output_filename
@@ -127,75 +128,44 @@ class ReactionReportGenerator:
             alignment=TA_CENTER
         ))
 
-    def create_progress_chart(self, dates, values):
-        """Создание графика прогресса с русскими подписями"""
-        plt.figure(figsize=(8, 4))
-        
+    def _report_chart(self, title, ylabel, color, marker_color, value_format):
+        """Раскладка графика отчёта: строится один раз на процесс, дальше меняются только данные"""
         # Настройка русских шрифтов для matplotlib
         if self.use_cyrillic:
-            plt.rcParams['font.family'] = 'DejaVu Sans'  # Поддерживает кириллицу
-        
-        # Стилизация графика
-        plt.plot(dates, values, marker='o', linewidth=2, markersize=8, 
-                color='#2E5A9C', markerfacecolor='#1A3A6B', markeredgecolor='white')
+            matplotlib.rcParams['font.family'] = 'DejaVu Sans'  # Поддерживает кириллицу
+
+        def setup(figure, axes):
+            # Стилизация графика
+            (line,) = axes.plot([], [], marker='o', linewidth=2, markersize=8,
+                                color=color, markerfacecolor=marker_color, markeredgecolor='white')
+            # Настройка внешнего вида с русскими подписями
+            axes.grid(True, alpha=0.3, linestyle='--')
+            axes.set_xlabel('Номер тренировки', fontsize=10, color='#2C3E50')
+            axes.set_ylabel(ylabel, fontsize=10, color='#2C3E50')
+            axes.set_title(title, fontsize=12, color='#2C3E50', pad=15)
+            # Форматирование дат
+            figure.autofmt_xdate()
+            return line
+
+        # Значения над точками
+        value_labels = {'fmt': value_format, 'textcoords': "offset points", 'xytext': (0, 10),
+                        'ha': 'center', 'fontsize': 8, 'color': "#000000"}
+        return LineChart(setup, figsize=(8, 4), dpi=100, value_labels=value_labels)
+
+    def create_progress_chart(self, dates, values):
+        """Создание графика прогресса с русскими подписями"""
         #3498DB
-        # Настройка внешнего вида с русскими подписями
-        plt.grid(True, alpha=0.3, linestyle='--')
-        plt.xlabel('Номер тренировки', fontsize=10, color='#2C3E50')
-        plt.ylabel('RTS (мс)', fontsize=10, color='#2C3E50')
-        plt.title('Прогресс среднего времени реакции', fontsize=12, color='#2C3E50', pad=15)
-        
-        # Форматирование дат
-        plt.gcf().autofmt_xdate()
-        
-        # Добавление значений на график
-        for i, (date, value) in enumerate(zip(dates, values)):
-            plt.annotate(f'{value} ', (date, value), 
-                        textcoords="offset points", xytext=(0,10), 
-                        ha='center', fontsize=8, color="#000000")
-        
+        chart = get_chart('report_progress', lambda: self._report_chart(
+            'Прогресс среднего времени реакции', 'RTS (мс)', '#2E5A9C', '#1A3A6B', '{} '))
         # Сохранение в байтовый поток
-        img_data = io.BytesIO()
-        plt.savefig(img_data, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        img_data.seek(0)
-        return img_data
+        return chart.update(dates, values).png(dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
     
     def create_mistakes_chart(self, dates, values):
         """Создание графика прогресса с русскими подписями"""
-        plt.figure(figsize=(8, 4))
-        
-        # Настройка русских шрифтов для matplotlib
-        if self.use_cyrillic:
-            plt.rcParams['font.family'] = 'DejaVu Sans'  # Поддерживает кириллицу
-        
-        # Стилизация графика
-        plt.plot(dates, values, marker='o', linewidth=2, markersize=8, 
-                color="#B44A4A", markerfacecolor="#7A2E2E", markeredgecolor='white')
-        
-        # Настройка внешнего вида с русскими подписями
-        plt.grid(True, alpha=0.3, linestyle='--')
-        plt.xlabel('Номер тренировки', fontsize=10, color='#2C3E50')
-        plt.ylabel('Прогресс точности (%)', fontsize=10, color='#2C3E50')
-        plt.title('Точность (%)', fontsize=12, color='#2C3E50', pad=15)
-        
-        # Форматирование дат
-        plt.gcf().autofmt_xdate()
-        
-        # Добавление значений на график
-        for i, (date, value) in enumerate(zip(dates, values)):
-            plt.annotate(f'{value}', (date, value), 
-                        textcoords="offset points", xytext=(0,10), 
-                        ha='center', fontsize=8, color="#000000")
-        
+        chart = get_chart('report_mistakes', lambda: self._report_chart(
+            'Точность (%)', 'Прогресс точности (%)', "#B44A4A", "#7A2E2E", '{}'))
         # Сохранение в байтовый поток
-        img_data = io.BytesIO()
-        plt.savefig(img_data, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        img_data.seek(0)
-        return img_data
+        return chart.update(dates, values).png(dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
 
     def generate_report(self, user_data):
         """
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+# ====================== КЭШ ОТРИСОВАННОГО ТЕКСТА ======================
+# font.render — самая дорогая операция на статичных экранах, а текст там
+# почти не меняется. Готовые поверхности храним по ключу
+# (шрифт, текст, цвет, сглаживание) и вытесняем самые давно использованные.
+# Возвращаемую поверхность нельзя менять (fill/blit на неё) — она общая.
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class TextCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Замена font.render(text, antialias, color) с кэшированием результата"""
+    return text_cache.render(font, text, color, antialias)
@@ -0,0 +1,78 @@
+import time
+
+import pygame
+
+# ====================== ТОЧНЫЙ ТАЙМИНГ ПРОБ ======================
+# Время реакции считается по time.perf_counter_ns, а не по get_ticks
+# в момент обработки события:
+#  * начало стимула отмечается сразу ПОСЛЕ flip, который его показал;
+#  * ввод опрашивается примерно раз в POLL_INTERVAL_MS без перерисовки
+#    (стимул статичен — кадр выводится один раз), метка события — момент опроса;
+#  * для каждой отметки известна погрешность: сколько шёл flip и сколько
+#    прошло с предыдущего опроса. Эти оценки сохраняются вместе с пробой.
+
+POLL_INTERVAL_MS = 1.0
+
+NS_PER_MS = 1_000_000
+
+
+def now_ns():
+    return time.perf_counter_ns()
+
+
+def ns_to_ms(ns):
+    return ns / NS_PER_MS
+
+
+class PerfClock:
+    """Настоящее время. В безголовом режиме подменяется виртуальными часами (headless.py)"""
+
+    def now_ns(self):
+        return time.perf_counter_ns()
+
+    def sleep_ns(self, ns):
+        time.sleep(ns / 1e9)
+
+
+class StampedEvent:
+    """Событие pygame с меткой времени опроса и окном неопределённости"""
+    __slots__ = ('event', 't_ns', 'error_ns')
+
+    def __init__(self, event, t_ns, error_ns):
+        self.event = event
+        self.t_ns = t_ns          # момент опроса, на котором событие получено
+        self.error_ns = error_ns  # событие произошло не раньше t_ns - error_ns
+
+    @property
+    def type(self):
+        return self.event.type
+
+
+class TimingEngine:
+    def __init__(self, poll_interval_ms=POLL_INTERVAL_MS, clock=None, event_source=None):
+        """clock — объект с now_ns()/sleep_ns(); event_source — замена pygame.event.get"""
+        self.poll_interval_ns = int(poll_interval_ms * NS_PER_MS)
+        self.clock = clock or PerfClock()
+        self.event_source = event_source or pygame.event.get
+        self._last_poll_ns = self.clock.now_ns()
+
+    def now_ns(self):
+        return self.clock.now_ns()
+
+    def sleep_ns(self, ns):
+        self.clock.sleep_ns(ns)
+
+    def present(self):
+        """flip с отметкой времени. Возвращает (момент показа, погрешность) в нс"""
+        before = self.clock.now_ns()
+        pygame.display.flip()
+        after = self.clock.now_ns()
+        # кадр ушёл на экран где-то за время вызова flip (при vsync — в его конце)
+        return after, after - before
+
+    def poll(self):
+        """Забирает накопившиеся события и ставит им метку времени опроса"""
+        t = self.clock.now_ns()
+        window = t - self._last_poll_ns
+        self._last_poll_ns = t
+        return [StampedEvent(e, t, window) for e in self.event_source()]
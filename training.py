@@ -0,0 +1,171 @@
+import sys
+
+import pygame
+
+from instrumentation import frame_stats, OVERLAY_KEY
+from timing import TimingEngine, NS_PER_MS, ns_to_ms
+
+# ====================== ЦИКЛ ТРЕНИРОВКИ ======================
+# Тренировка — конечный автомат фаз: фиксация → стимул → обратная связь → ...
+# Один цикл на всю сессию: каждая фаза при входе один раз выводит свой кадр
+# и получает явный дедлайн, дальше цикл только опрашивает ввод до дедлайна.
+# Никаких pygame.time.wait — QUIT и клики обрабатываются в любой фазе,
+# клики вне стимула записываются как преждевременные (anticipations).
+# Нажатие относится к фазе по своей метке времени: если оно пришло уже после
+# дедлайна (sleep_ns проспал), фаза сначала завершается, а клик уходит в следующую.
+# Вывод кадров, запаздывание фаз и задержка ввода пишутся в frame_stats.
+
+FIXATION = 'fixation'
+STIMULUS = 'stimulus'
+FEEDBACK = 'feedback'
+DONE = 'done'
+
+STIMULUS_TIMEOUT_MS = 800
+FEEDBACK_MS = 400
+FRAME_BUDGET_MS = 1000 / 60   # вывод кадра фазы не должен занимать больше одного кадра 60 Гц
+PHASES = (FIXATION, STIMULUS, FEEDBACK)
+
+
+class TrainingSession:
+    def __init__(self, screen, stimuli, plan, timing=None,
+                 timeout_ms=STIMULUS_TIMEOUT_MS, feedback_ms=FEEDBACK_MS, observer=None):
+        """observer(phase, trial, t_ns) вызывается при входе в каждую фазу (нужен headless.py)"""
+        self.screen = screen
+        self.stimuli = stimuli
+        self.plan = list(plan)
+        self.timing = timing or TimingEngine()
+        self.timeout_ms = timeout_ms
+        self.feedback_ms = feedback_ms
+        self.observer = observer
+
+        self.results = []
+        self.budget_overruns = 0   # сколько раз вывод кадра не уложился в FRAME_BUDGET_MS
+
+        self.phase = None
+        self.deadline = None
+        self.trial_index = -1
+        self._trial = None
+        self._stim_rect = None
+        self._stim_start = None
+        self._session_start = None
+
+    def run(self):
+        """Проводит все пробы плана, возвращает список результатов"""
+        self._session_start = self.timing.now_ns()
+        self._next_trial()
+        while self.phase != DONE:
+            for event in self.timing.poll():
+                self._handle(event)
+            t = self.timing.now_ns()
+            if t >= self.deadline:
+                self._expire(t)
+                continue
+            # до дедлайна фазы — только частый опрос ввода, кадр уже на экране
+            self.timing.sleep_ns(min(self.deadline - t, self.timing.poll_interval_ns))
+        return self.results
+
+    # ---------- фазы ----------
+
+    def _next_trial(self):
+        self.trial_index += 1
+        if self.trial_index >= len(self.plan):
+            self.phase = DONE
+            return
+        is_go, iti = self.plan[self.trial_index]
+        self._trial = {'is_go': is_go, 'rt': None, 'correct': None, 'iti': iti, 'onset': None,
+                       'onset_error': None, 'input_error': None, 'anticipations': 0}
+        shown, _ = self._show(self.stimuli.fixation, FIXATION)
+        self._enter(FIXATION, shown + iti * NS_PER_MS)
+
+    def _expire(self, t):
+        """Дедлайн фазы прошёл: записывает запаздывание и переходит к следующей"""
+        frame_stats.record(self.phase, drift_ms=ns_to_ms(t - self.deadline))
+        self._advance()
+
+    def _advance(self):
+        if self.phase == FIXATION:
+            frame, self._stim_rect = self.stimuli.stimulus(self._trial['is_go'])
+            shown, error = self._show(frame, STIMULUS)  # ← отсчёт RT от момента после flip
+            self._trial['onset'] = round(ns_to_ms(shown - self._session_start), 1)
+            self._trial['onset_error'] = round(ns_to_ms(error), 3)
+            self._stim_start = shown
+            self._enter(STIMULUS, shown + self.timeout_ms * NS_PER_MS)
+        elif self.phase == STIMULUS:
+            trial = self._trial
+            responded = trial['rt'] is not None
+            trial['correct'] = responded == trial['is_go']
+            self.results.append(trial)
+            shown, _ = self._show(self.stimuli.feedback(trial['correct']), FEEDBACK)
+            self._enter(FEEDBACK, shown + self.feedback_ms * NS_PER_MS)
+        elif self.phase == FEEDBACK:
+            self._next_trial()
+
+    def _enter(self, phase, deadline):
+        self.phase = phase
+        self.deadline = deadline
+        if self.observer is not None:
+            self.observer(phase, self._trial, self.timing.now_ns())
+
+    def _show(self, frame, phase):
+        """Единственная точка вывода кадра; следит за бюджетом времени"""
+        start = self.timing.now_ns()
+        self.screen.blit(frame, (0, 0))
+        if frame_stats.overlay_visible:
+            frame_stats.draw_overlay(self.screen, phase)
+        rendered = self.timing.now_ns()
+        shown, error = self.timing.present()
+        if ns_to_ms(shown - start) > FRAME_BUDGET_MS:
+            self.budget_overruns += 1
+        frame_stats.record(phase, render_ms=ns_to_ms(rendered - start), flip_ms=ns_to_ms(error))
+        return shown, error
+
+    # ---------- ввод ----------
+
+    def _handle(self, stamped):
+        event = stamped.event
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+            frame_stats.toggle_overlay()  # появится со следующим кадром фазы
+            return
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return
+        while self.phase != DONE and stamped.t_ns >= self.deadline:
+            self._expire(self.timing.now_ns())
+        if self.phase == DONE:
+            return
+        frame_stats.record(self.phase, latency_ms=ns_to_ms(stamped.error_ns))
+        if self.phase == STIMULUS and stamped.t_ns < self._stim_start:
+            # фиксация кончилась, но стимул ещё не был на экране — нажатие преждевременное
+            self._trial['anticipations'] += 1
+        elif self.phase == STIMULUS:
+            trial = self._trial
+            if trial['rt'] is None and self._stim_rect.collidepoint(event.pos):
+                trial['rt'] = round(ns_to_ms(stamped.t_ns - self._stim_start), 1)
+                trial['input_error'] = round(ns_to_ms(stamped.error_ns), 3)
+        elif self.phase in (FIXATION, FEEDBACK):
+            # нажатие до стимула или на обратной связи — преждевременное, в счёт текущей пробы
+            self._trial['anticipations'] += 1
+
+
+def session_metrics(results):
+    """Итоговые метрики сессии по результатам проб"""
+    num_trials = len(results)
+    correct_go_rts = [r['rt'] for r in results if r['is_go'] and r['correct'] and r['rt'] is not None]
+
+    avg_rt = sum(correct_go_rts) / len(correct_go_rts) if correct_go_rts else 0.0
+    variability = (sum((x - avg_rt) ** 2 for x in correct_go_rts) / len(correct_go_rts)) ** 0.5 if len(
+        correct_go_rts) > 1 else 0.0
+    misses = sum(1 for r in results if r['is_go'] and not r['correct'])
+    false_alarms = sum(1 for r in results if not r['is_go'] and not r['correct'])
+    accuracy = (sum(1 for r in results if r['correct']) / num_trials * 100) if num_trials else 0.0
+
+    return {
+        'avg_rt': round(avg_rt, 1),
+        'misses': misses,
+        'false_alarms': false_alarms,
+        'variability': round(variability, 1),
+        'accuracy': round(accuracy, 1),
+        'correct_rts': correct_go_rts
+    }
@@ -0,0 +1,72 @@
+import threading
+
+from db import get_connection
+
+# ====================== КЭШ СОСТОЯНИЯ ПОЛЬЗОВАТЕЛЯ ======================
+# streak и last_training_date загружаются один раз после входа и дальше
+# читаются из памяти — главное меню не трогает базу на каждом кадре.
+# Свои записи обновляют кэш напрямую (update/invalidate), чужие
+# (editor.py в другом процессе, другие станции) ловятся через PRAGMA data_version.
+# update вызывается и из потока записи сессий, поэтому словарь под блокировкой.
+# Отсутствие пользователя в базе тоже кэшируется (_MISSING) — иначе меню
+# с несуществующим id ходило бы в базу каждый кадр.
+
+_MISSING = object()
+
+
+class UserStateCache:
+    def __init__(self):
+        self._states = {}
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def load(self, user_id):
+        """Читает состояние пользователя из базы и кладёт в кэш"""
+        conn = get_connection()
+        row = conn.execute("SELECT streak, last_training_date FROM users WHERE id = ?",
+                           (user_id,)).fetchone()
+        with self._lock:
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if row is None:
+                self._states[user_id] = _MISSING
+                return None
+            state = {'streak': row[0] or 0, 'last_training_date': row[1]}
+            self._states[user_id] = state
+            return state
+
+    def get(self, user_id):
+        """Состояние из памяти; к базе обращается только при промахе"""
+        state = self._states.get(user_id)
+        if state is None:
+            return self.load(user_id)
+        return None if state is _MISSING else state
+
+    def update(self, user_id, **fields):
+        """Обновляет кэш после собственной записи в базу"""
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None or state is _MISSING:
+                self._states[user_id] = {'streak': 0, 'last_training_date': None}
+                state = self._states[user_id]
+            state.update(fields)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._states.clear()
+            else:
+                self._states.pop(user_id, None)
+
+    def refresh_if_changed(self):
+        """Сбрасывает кэш, если базу изменило другое соединение.
+
+        Вызывается между экранами, а не в цикле отрисовки.
+        """
+        version = get_connection().execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            if self._data_version is not None and version != self._data_version:
+                self._states.clear()
+            self._data_version = version
+
+
+user_states = UserStateCache()
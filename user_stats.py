@@ -0,0 +1,84 @@
+from db import transaction
+
+# ====================== СВОДНАЯ СТАТИСТИКА ПОЛЬЗОВАТЕЛЕЙ ======================
+# user_stats хранит накопленные суммы и счётчики по сессиям каждого
+# пользователя. write_session обновляет строку в той же транзакции, что и
+# вставку сессии, поэтому лидерборд читает готовые средние по индексу,
+# а не агрегирует всю таблицу sessions.
+# errors = misses + false_alarms, как и в лидерборде.
+# Сессии удалённых пользователей (editor.py удаляет только users/user_stats)
+# при пересчёте пропускаются.
+
+RECORD_SESSION_SQL = '''
+    INSERT INTO user_stats (
+        user_id, session_count, sum_rt, sum_errors, sum_accuracy,
+        avg_rt, avg_errors, avg_accuracy, best_rt, best_accuracy,
+        last_session_id, last_session_date, last_rt, last_accuracy)
+    VALUES (:user_id, 1, :rt, :errors, :accuracy,
+            :rt, :errors, :accuracy,
+            CASE WHEN :rt > 0 THEN :rt END, :accuracy,
+            :session_id, :date, :rt, :accuracy)
+    ON CONFLICT(user_id) DO UPDATE SET
+        session_count = session_count + 1,
+        sum_rt        = sum_rt + excluded.sum_rt,
+        sum_errors    = sum_errors + excluded.sum_errors,
+        sum_accuracy  = sum_accuracy + excluded.sum_accuracy,
+        avg_rt        = (sum_rt + excluded.sum_rt) / (session_count + 1),
+        avg_errors    = (sum_errors + excluded.sum_errors) / (session_count + 1),
+        avg_accuracy  = (sum_accuracy + excluded.sum_accuracy) / (session_count + 1),
+        best_rt       = CASE WHEN excluded.best_rt IS NULL THEN best_rt
+                             WHEN best_rt IS NULL OR excluded.best_rt < best_rt THEN excluded.best_rt
+                             ELSE best_rt END,
+        best_accuracy = MAX(best_accuracy, excluded.best_accuracy),
+        last_session_id   = excluded.last_session_id,
+        last_session_date = excluded.last_session_date,
+        last_rt           = excluded.last_rt,
+        last_accuracy     = excluded.last_accuracy
+'''
+
+REBUILD_SQL = '''
+    INSERT INTO user_stats (
+        user_id, session_count, sum_rt, sum_errors, sum_accuracy,
+        avg_rt, avg_errors, avg_accuracy, best_rt, best_accuracy,
+        last_session_id, last_session_date, last_rt, last_accuracy)
+    SELECT agg.user_id, agg.n, agg.sum_rt, agg.sum_errors, agg.sum_accuracy,
+           agg.sum_rt / agg.n, agg.sum_errors / agg.n, agg.sum_accuracy / agg.n,
+           agg.best_rt, agg.best_accuracy,
+           last.id, last.date, last.avg_rt, last.accuracy
+    FROM (
+        SELECT user_id,
+               COUNT(*) AS n,
+               TOTAL(avg_rt) AS sum_rt,
+               TOTAL(misses + false_alarms) AS sum_errors,
+               TOTAL(accuracy) AS sum_accuracy,
+               MIN(CASE WHEN avg_rt > 0 THEN avg_rt END) AS best_rt,
+               MAX(accuracy) AS best_accuracy,
+               MAX(id) AS last_id
+        FROM sessions
+        WHERE user_id IN (SELECT id FROM users)
+        GROUP BY user_id
+    ) agg
+    JOIN sessions last ON last.id = agg.last_id
+'''
+
+
+def record_session(cur, user_id, session_id, date, metrics):
+    """Добавляет сессию в сводку. Вызывается внутри транзакции write_session"""
+    cur.execute(RECORD_SESSION_SQL, {
+        'user_id': user_id,
+        'session_id': session_id,
+        'date': date,
+        'rt': metrics['avg_rt'] or 0.0,
+        'errors': (metrics['misses'] or 0) + (metrics['false_alarms'] or 0),
+        'accuracy': metrics['accuracy'] or 0.0,
+    })
+
+
+def rebuild_user_stats(cur=None):
+    """Полностью пересчитывает user_stats по таблице sessions. Возвращает число строк"""
+    if cur is not None:
+        cur.execute("DELETE FROM user_stats")
+        cur.execute(REBUILD_SQL)
+        return cur.rowcount
+    with transaction() as cur:
+        return rebuild_user_stats(cur)
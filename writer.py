@@ -0,0 +1,131 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from db import get_connection
+
+# ====================== ФОНОВАЯ ЗАПИСЬ В БАЗУ ======================
+# Запись результатов тренировки не должна замораживать экран, если базу
+# держит другая станция. Задания (функции вида job(cur)) кладутся в очередь,
+# отдельный поток забирает всё, что накопилось, и выполняет одной
+# транзакцией. При SQLITE_BUSY/LOCKED — повтор с экспоненциальной паузой.
+# submit() возвращает Future, экран результатов опрашивает его без блокировки.
+
+WRITER_BUSY_TIMEOUT_MS = 250   # короткое ожидание внутри SQLite, дальше — наши повторы
+MAX_RETRIES = 10
+BASE_DELAY = 0.05
+MAX_DELAY = 2.0
+
+_STOP = object()
+
+
+def _is_busy(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class SessionWriter:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, *jobs):
+        """Ставит задания в очередь. Все jobs одного вызова попадут в одну транзакцию.
+
+        Future получает список результатов jobs (в том же порядке).
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((jobs, future))
+        return future
+
+    def flush(self):
+        """Ждёт, пока все поставленные задания будут записаны"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        get_connection().execute(f"PRAGMA busy_timeout = {WRITER_BUSY_TIMEOUT_MS}")
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            # забираем всё, что успело накопиться — пишем одной транзакцией
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write(batch)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        try:
+            results = self._with_retries(batch)
+        except Exception as e:
+            if len(batch) > 1 and not _is_busy(e):
+                # одно задание сломало общую транзакцию — пишем остальные по отдельности
+                for item in batch:
+                    self._write([item])
+                return
+            for _, future in batch:
+                future.set_exception(e)
+            print(f"❌ Фоновая запись не удалась: {e}")
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _with_retries(self, batch):
+        conn = get_connection()
+        attempt = 0
+        while True:
+            cur = conn.cursor()
+            try:
+                results = [[job(cur) for job in jobs] for jobs, _ in batch]
+                conn.commit()
+                return results
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if not _is_busy(e) or attempt >= MAX_RETRIES:
+                    raise
+                delay = min(MAX_DELAY, BASE_DELAY * 2 ** attempt)
+                attempt += 1
+                print(f"⏳ База занята, повтор через {delay:.2f} с ({attempt}/{MAX_RETRIES})")
+                time.sleep(delay)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+
+session_writer = SessionWriter()
+
+# при выходе (в т.ч. через sys.exit) дописываем очередь до закрытия соединений
+atexit.register(session_writer.close)